@@ -0,0 +1,56 @@
+# -*- coding: utf-8 -*-
+"""
+Outils communs aux benchmarks : import de src/webapp.py sans effets de bord
+(log, dxcc.json, spots.json redirigés vers un dossier temporaire) et
+construction d'un RadioSpotWatcher « nu » (sans réseau ni threads).
+"""
+
+import os, sys, csv, time, tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SRC = os.path.join(ROOT, "src")
+TMP = tempfile.mkdtemp(prefix="rsw-bench-")
+
+os.environ.setdefault("LOG_FILE", os.path.join(TMP, "rspot.log"))
+os.environ.setdefault("SPOTS_FILE", os.path.join(TMP, "spots.json"))
+os.environ.setdefault("DXCC_FILE", os.path.join(TMP, "dxcc.json"))
+if SRC not in sys.path:
+    sys.path.insert(0, SRC)
+
+import logging
+import webapp  # noqa: E402
+
+logging.getLogger("radio-spot-watcher").setLevel(logging.WARNING)
+
+
+def load_cty_csv(path=os.path.join(SRC, "cty.csv")):
+    out = {}
+    with open(path, newline="", encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            p = (row.get("Prefix") or "").strip().upper()
+            if not p or p in out: continue
+            out[p] = {
+                "country": (row.get("Entity") or "").strip(),
+                "lat": float(row.get("Latitude") or 0),
+                "lon": float(row.get("Longitude") or 0),
+                "continent": (row.get("Continent") or "").strip(),
+            }
+    return out
+
+
+def bare_watcher(dxcc_map=None):
+    """RadioSpotWatcher sans __init__ (pas de réseau, pas de fichiers)."""
+    w = webapp.RadioSpotWatcher.__new__(webapp.RadioSpotWatcher)
+    w.dxcc_map = dict(dxcc_map if dxcc_map is not None else load_cty_csv())
+    w.dxcc_cache = webapp.LRUCache(webapp.DXCC_CACHE_SIZE)
+    w._rebuild_prefix_index()
+    return w
+
+
+def timeit(fn, *args, repeat=5):
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn(*args)
+        best = min(best, time.perf_counter() - t0)
+    return best
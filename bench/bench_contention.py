@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Contention sur self.lock : lecteurs HTTP concurrents + ingestion, avec le
+verrou partagé (v2.91 : chaque lecture copie la fenêtre sous self.lock) puis
+avec la vue publiée (SpotView, lue sans verrou).
+
+  python3 bench/bench_contention.py [--readers 1,4,16,64] [--lines 20000] [--chunk 16]
+
+Un thread d'ingestion passe --lines lignes synthétiques par blocs de --chunk
+(comme _cluster_reader) pendant que N threads lecteurs rejouent la logique
+des routes /spots.json (?since= d'un client à jour, et liste complète servie
+par SnapshotCache) et /status.json. Relevés : débit d'ingestion, lectures/s,
+latence des lectures et attente sur self.lock (TimedRLock).
+"""
+
+import argparse, json, os, sys, threading, time
+from itertools import takewhile
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from _common import load_cty_csv, webapp  # noqa: E402
+from fake_cluster import synthetic_lines  # noqa: E402
+
+
+def encode(L, seq):
+    L = [webapp.spot_json(x) for x in L]
+    return json.dumps({"spots": L, "map_spots": L[:webapp.MAX_MAP_SPOTS], "seq": seq}, separators=(",", ":"))
+
+
+# --- Lecteurs v2.91 : copies sous self.lock (routes et filter_spots historiques) ---
+
+def legacy_read(w, i):
+    with w.lock:
+        seq, version = w.spot_seq, w.spots_version
+    if i % 4 == 0:
+        def build():
+            with w.lock:
+                L, s, v = list(w.spots), w.spot_seq, w.spots_version
+            return v, {"spots": [webapp.spot_json(x) for x in L], "seq": s}
+        return w.snapshots.get("legacy", version, build).body
+    with w.lock:
+        L = list(w.spots)
+    with w.lock:
+        total = len(w.spots)  # /status.json
+    return encode(list(takewhile(lambda s: s.get("seq", 0) > seq - 5, L)), seq), total
+
+
+# --- Lecteurs actuels : vue publiée, sans verrou ---
+
+def view_read(w, i):
+    v = w.view
+    if i % 4 == 0:
+        return w.snapshots.get("spots", v.version, lambda: w._spots_snapshot(v)).body
+    total = len(w.view.spots)  # /status.json
+    return encode(list(takewhile(lambda s: s.get("seq", 0) > v.seq - 5, v.spots)), v.seq), total
+
+
+def run(w, lines, chunk, readers, read, publish):
+    w.lock = webapp.TimedRLock(webapp.Histogram())
+    stop = threading.Event()
+    lat = []
+
+    def reader():
+        mine, i = [], 0
+        while not stop.is_set():
+            t0 = time.perf_counter()
+            read(w, i)
+            mine.append(time.perf_counter() - t0)
+            i += 1
+        lat.extend(mine)
+
+    ts = [threading.Thread(target=reader) for _ in range(readers)]
+    for t in ts: t.start()
+    t0 = time.perf_counter()
+    for k in range(0, len(lines), chunk):
+        for l in lines[k:k + chunk]:
+            w._ingest_line(l, publish=False)
+        if publish:
+            w._publish_view()
+    elapsed = time.perf_counter() - t0
+    stop.set()
+    for t in ts: t.join()
+    lat.sort()
+    wait = w.lock.wait
+    return {"lines_s": len(lines) / elapsed, "reads_s": len(lat) / elapsed,
+            "p50": lat[len(lat) // 2] if lat else 0.0, "p99": lat[int(len(lat) * 0.99)] if lat else 0.0,
+            "contended": w.lock.contended, "wait_ms": wait.sum * 1e3}
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--readers", default="1,4,16,64")
+    ap.add_argument("--lines", type=int, default=20000)
+    ap.add_argument("--chunk", type=int, default=16, help="lignes par bloc reçu (une vue publiée par bloc)")
+    args = ap.parse_args()
+
+    w = webapp.RadioSpotWatcher()
+    w._install_dxcc(load_cty_csv())
+    w.history = w.journal = None
+    first = 0
+    print(f"MAX_SPOTS={webapp.MAX_SPOTS} lignes={args.lines} bloc={args.chunk}")
+    print("  lecteurs  modèle         lignes/s  lectures/s   p50 ms   p99 ms  attentes verrou (ms)")
+    for n in (int(x) for x in args.readers.split(",")):
+        for name, read, publish in (("verrou v2.91", legacy_read, False), ("vue publiée", view_read, True)):
+            lines = synthetic_lines(args.lines, first=first)  # indicatifs neufs : pas de fusion
+            first += args.lines
+            r = run(w, lines, args.chunk, n, read, publish)
+            print(f"  {n:>8}  {name:<13} {r['lines_s']:>9.0f} {r['reads_s']:>11.0f} {r['p50'] * 1e3:>8.2f} "
+                  f"{r['p99'] * 1e3:>8.2f}  {r['contended']:>8} ({r['wait_ms']:.0f})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark dxcc_lookup : index par longueur de préfixe vs ancien scan linéaire.
+
+  python3 bench/bench_dxcc_lookup.py [--extra 5000] [--calls 20000]
+
+La table cty.csv est complétée par --extra préfixes/exceptions synthétiques
+pour simuler un cty complet. Les deux méthodes doivent donner les mêmes
+réponses ; le script échoue sinon.
+"""
+
+import argparse, json, os, random, string, sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from _common import ROOT, bare_watcher, load_cty_csv, timeit  # noqa: E402
+
+UNKNOWN = {"country": "Unknown", "lat": 0, "lon": 0, "continent": "??"}
+
+
+def linear_lookup(w, callsign):
+    # Copie de l'implémentation historique (v2.91) pour comparaison
+    raw = (callsign or "").upper()
+    base = w._clean_call(raw)
+    for pref in w.sorted_prefixes:
+        if base.startswith(pref):
+            return w.dxcc_map.get(pref, UNKNOWN)
+    for pref in w.sorted_prefixes:
+        if raw.startswith(pref):
+            return w.dxcc_map.get(pref, UNKNOWN)
+    return UNKNOWN
+
+
+def synthetic_call(rng):
+    pre = rng.choice(["", "", "", "EA8/", "F/", "VP2E/"])
+    body = "".join(rng.choice(string.ascii_uppercase) for _ in range(rng.randint(1, 2)))
+    body += str(rng.randint(0, 9))
+    body += "".join(rng.choice(string.ascii_uppercase) for _ in range(rng.randint(1, 3)))
+    suf = rng.choice(["", "", "", "/P", "/M", "/QRP", "/MM"])
+    return pre + body + suf
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--extra", type=int, default=5000, help="préfixes synthétiques ajoutés")
+    ap.add_argument("--calls", type=int, default=20000, help="indicatifs à résoudre")
+    ap.add_argument("--unique", type=int, default=800, help="indicatifs distincts (re-spots)")
+    ap.add_argument("--seed", type=int, default=738)
+    args = ap.parse_args()
+    rng = random.Random(args.seed)
+
+    dxcc = load_cty_csv()
+    base_entries = list(dxcc.values())
+    while len(dxcc) < len(base_entries) + args.extra:
+        # exceptions type cty.dat : préfixes longs / indicatifs complets
+        dxcc[synthetic_call(rng).split("/")[0][: rng.randint(3, 6)]] = rng.choice(base_entries)
+    w = bare_watcher(dxcc)
+
+    calls = []
+    try:
+        with open(os.path.join(ROOT, "spots.json"), encoding="utf-8") as f:
+            calls = [s.get("call", "") for s in json.load(f)]
+    except Exception:
+        pass
+    pool = [synthetic_call(rng) for _ in range(args.unique)]
+    while len(calls) < args.calls:
+        calls.append(rng.choice(pool))
+
+    for c in calls:
+        if w._dxcc_resolve(c) != linear_lookup(w, c):
+            sys.exit(f"Divergence pour {c!r}: {w._dxcc_resolve(c)} != {linear_lookup(w, c)}")
+
+    t_lin = timeit(lambda: [linear_lookup(w, c) for c in calls], repeat=3)
+    t_idx = timeit(lambda: [w._dxcc_resolve(c) for c in calls], repeat=3)
+    t_lru = timeit(lambda: [w.dxcc_lookup(c) for c in calls], repeat=3)
+    n = len(calls)
+    print(f"préfixes={len(dxcc)} longueurs={w.prefix_lengths} indicatifs={n}")
+    print(f"  scan linéaire : {t_lin * 1e6 / n:8.2f} µs/lookup")
+    print(f"  index         : {t_idx * 1e6 / n:8.2f} µs/lookup  (x{t_lin / t_idx:.1f})")
+    print(f"  index + LRU   : {t_lru * 1e6 / n:8.2f} µs/lookup  {w.dxcc_cache.stats()}")
+
+
+if __name__ == "__main__":
+    main()
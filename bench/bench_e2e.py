@@ -0,0 +1,220 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Banc de bout en bout : faux cluster (processus séparé) -> _cluster_reader ->
+fenêtre / SSE, puis lecture HTTP de /spots.json par des clients concurrents.
+
+  python3 bench/bench_e2e.py [--rates 500,1000,2000,5000,10000,0] [--duration 5]
+                             [--clients 1,4,16] [--json rapport.json]
+
+1. Ingestion : pour chaque débit de --rates (lignes/s, 0 = débit du socket),
+   bench/fake_cluster.py rejoue rate x duration lignes synthétiques
+   horodatées (--stamp). Le watcher s'y connecte par CLUSTER_HOST/CLUSTER_PORT
+   et lit le flux avec _cluster_reader. La latence jusqu'à l'affichage
+   (envoi -> événement « spot » publié aux clients /stream) et le débit
+   atteint sont relevés. Un débit est tenu si toutes les lignes sont vues et
+   si le p99 reste sous --max-p99.
+2. HTTP : pendant une ingestion de fond (--http-rate), N clients (processus
+   séparé, un thread par client) lisent /spots.json en boucle sur un serveur
+   werkzeug multi-thread, comme python3 src/webapp.py.
+
+Le rapport (texte, et JSON avec --json) porte la version et la plateforme,
+pour comparer les versions entre elles.
+"""
+
+import argparse, json, os, platform, socket, subprocess, sys, threading, time
+from datetime import datetime, timezone
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def percentiles(values, ps=(50, 95, 99)):
+    v = sorted(values)
+    out = {f"p{p}": v[min(len(v) - 1, int(len(v) * p / 100))] if v else None for p in ps}
+    out["max"] = v[-1] if v else None
+    return out
+
+
+# --- Mode client (processus séparé : le GIL du serveur n'est pas partagé) ---
+
+def client_main(url, threads, duration):
+    import http.client
+    from urllib.parse import urlsplit
+    u = urlsplit(url)
+    lat, errors, stop_at = [], [0], time.perf_counter() + duration
+
+    def run():
+        mine = []
+        while time.perf_counter() < stop_at:
+            t0 = time.perf_counter()
+            try:
+                c = http.client.HTTPConnection(u.hostname, u.port, timeout=10)
+                c.request("GET", u.path + ("?" + u.query if u.query else ""), headers={"Accept-Encoding": "gzip"})
+                r = c.getresponse()
+                r.read()
+                c.close()
+                if r.status != 200: errors[0] += 1
+            except OSError:
+                errors[0] += 1
+                continue
+            mine.append(time.perf_counter() - t0)
+        lat.extend(mine)
+
+    ts = [threading.Thread(target=run) for _ in range(threads)]
+    for t in ts: t.start()
+    for t in ts: t.join()
+    print(json.dumps({"clients": threads, "requests": len(lat), "errors": errors[0],
+                      "rps": len(lat) / duration, **percentiles(lat)}))
+
+
+# --- Pilote ---
+
+_first = [0]  # indicatifs jamais rejoués : pas de fusion par le dédoublonnage d'un palier à l'autre
+
+
+def start_fake(port, n, rate):
+    first, _first[0] = _first[0], _first[0] + n
+    p = subprocess.Popen([sys.executable, os.path.join(HERE, "fake_cluster.py"), "--port", str(port),
+                          "--synthetic", str(n), "--first", str(first), "--rate", str(rate),
+                          "--stamp", "--close"],
+                         stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True)
+    p.stdout.readline()  # « [fake] N lignes, écoute sur ... »
+    return p
+
+
+def ingest_run(webapp, w, rate, n):
+    """Une connexion : n lignes à `rate` lignes/s ; renvoie débit et latences."""
+    port = free_port()
+    fake = start_fake(port, n, rate)
+    sub = w.broadcaster.subscribe()
+    sub.q.maxsize = 0  # le pilote ne doit jamais être décroché
+    lat, seen = [], [0]
+    done = threading.Event()
+
+    def consume():
+        while not (done.is_set() and sub.q.empty()):
+            try:
+                event, payload = sub.q.get(timeout=0.2)
+            except Exception:
+                continue
+            if event != "spot": continue
+            now = time.time_ns() // 1000
+            seen[0] += 1
+            i = payload.find(" t1")
+            if i >= 0:
+                lat.append((now - int(payload[i + 2:i + 18])) / 1e6)
+
+    consumer = threading.Thread(target=consume)
+    consumer.start()
+    try:
+        w.current_cluster = ("127.0.0.1", port)
+        w.connect_cluster()
+        t0 = time.perf_counter()
+        w._cluster_reader()  # rend la main à la fermeture par le faux cluster
+        elapsed = time.perf_counter() - t0
+    finally:
+        done.set()
+        consumer.join()
+        w.broadcaster.unsubscribe(sub)
+        fake.terminate()
+        fake.wait(10)
+    return {"rate": rate, "sent": n, "visible": seen[0], "elapsed_s": elapsed,
+            "throughput": seen[0] / elapsed if elapsed else 0.0, **percentiles(lat)}
+
+
+def http_run(webapp, w, clients, duration, rate):
+    import logging
+    from werkzeug.serving import make_server
+    logging.getLogger("werkzeug").setLevel(logging.WARNING)  # une ligne de log par requête sinon
+    port = free_port()
+    srv = make_server("127.0.0.1", port, w.app, threaded=True)
+    threading.Thread(target=srv.serve_forever, daemon=True).start()
+    bg = threading.Thread(target=ingest_run, args=(webapp, w, rate, int(rate * duration * (len(clients) + 1))))
+    bg.start()
+    out = []
+    try:
+        for k in clients:
+            r = subprocess.run([sys.executable, os.path.abspath(__file__), "--client",
+                                f"http://127.0.0.1:{port}/spots.json", "--threads", str(k),
+                                "--duration", str(duration)], capture_output=True, text=True, check=True)
+            out.append(json.loads(r.stdout.strip().splitlines()[-1]))
+    finally:
+        bg.join()
+        srv.shutdown()
+    return out
+
+
+def ms(v):
+    return "     -" if v is None else f"{v * 1e3:8.2f}"
+
+
+def report(res):
+    print(f"Radio Spot Watcher {res['version']} | Python {res['python']} | {res['platform']} | {res['date']}")
+    print(f"MAX_SPOTS={res['max_spots']} SPOTS_STORE={res['store']} SPOTS_BACKEND={res['backend']} "
+          f"DEDUP_WINDOW={res['dedup']}")
+    print("\nIngestion (faux cluster -> _cluster_reader -> événement SSE)")
+    print("  débit demandé   envoyées    vues   lignes/s     p50 ms    p95 ms    p99 ms    max ms")
+    for r in res["ingest"]:
+        asked = "max" if not r["rate"] else f"{r['rate']:g}/s"
+        print(f"  {asked:>13} {r['sent']:>10} {r['visible']:>7} {r['throughput']:>10.0f} "
+              f"{ms(r['p50'])}  {ms(r['p95'])}  {ms(r['p99'])}  {ms(r['max'])}")
+    print(f"  débit maximal soutenu : {res['sustained']:.0f} lignes/s (p99 < {res['max_p99'] * 1e3:.0f} ms)")
+    print(f"\nHTTP /spots.json (ingestion de fond {res['http_rate']:g} lignes/s)")
+    print("  clients   req/s  erreurs     p50 ms    p95 ms    p99 ms    max ms")
+    for r in res["http"]:
+        print(f"  {r['clients']:>7} {r['rps']:>7.0f} {r['errors']:>8} {ms(r['p50'])}  {ms(r['p95'])}  "
+              f"{ms(r['p99'])}  {ms(r['max'])}")
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--rates", default="500,1000,2000,5000,10000,0", help="lignes/s (0 = débit du socket)")
+    ap.add_argument("--duration", type=float, default=5, help="secondes par palier")
+    ap.add_argument("--max-lines", type=int, default=100000, help="lignes max par palier (débit 0)")
+    ap.add_argument("--max-p99", type=float, default=0.25, help="p99 (s) au-delà duquel un débit n'est pas tenu")
+    ap.add_argument("--clients", default="1,4,16")
+    ap.add_argument("--http-rate", type=float, default=200, help="ingestion de fond pendant le test HTTP")
+    ap.add_argument("--json", help="écrit aussi le rapport en JSON")
+    ap.add_argument("--client", help=argparse.SUPPRESS)
+    ap.add_argument("--threads", type=int, default=1, help=argparse.SUPPRESS)
+    args = ap.parse_args()
+    if args.client:
+        return client_main(args.client, args.threads, args.duration)
+
+    # le watcher vise le faux cluster ; chaque palier prend un port libre
+    os.environ.setdefault("CLUSTER_HOST", "127.0.0.1")
+    os.environ.setdefault("CLUSTER_PORT", str(free_port()))
+    sys.path.insert(0, HERE)
+    from _common import load_cty_csv, webapp  # noqa: E402
+
+    w = webapp.RadioSpotWatcher()
+    w._install_dxcc(load_cty_csv())
+    threading.Thread(target=w.persist_worker, daemon=True).start()  # écriture différée réelle
+
+    res = {"version": webapp.VERSION, "python": platform.python_version(), "platform": platform.platform(),
+           "date": datetime.now(timezone.utc).isoformat(timespec="seconds"), "max_spots": webapp.MAX_SPOTS,
+           "store": webapp.SPOTS_STORE, "backend": webapp.SPOTS_BACKEND, "dedup": webapp.DEDUP_WINDOW,
+           "max_p99": args.max_p99, "http_rate": args.http_rate, "ingest": [], "http": []}
+    for rate in (float(r) for r in args.rates.split(",")):
+        n = args.max_lines if not rate else min(args.max_lines, int(rate * args.duration))
+        res["ingest"].append(ingest_run(webapp, w, rate, n))
+    ok = [r for r in res["ingest"]
+          if r["visible"] == r["sent"] and r["p99"] is not None and r["p99"] < args.max_p99]
+    res["sustained"] = max((r["throughput"] if not r["rate"] else r["rate"] for r in ok), default=0.0)
+    res["http"] = http_run(webapp, w, [int(c) for c in args.clients.split(",")], args.duration, args.http_rate)
+    w.stop_event.set()
+
+    report(res)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(res, f, indent=1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Micro-benchmark du découpage en lignes de _cluster_reader.
+
+  python3 bench/bench_framing.py [--file capture.txt] [--mb 8] [--chunk 4096]
+
+Compare l'ancien tampon str (split("\\n", 1) ligne par ligne) à LineFramer
+sur un flux de plusieurs Mo découpé comme par recv(). Sans --file, le flux
+est reconstruit depuis spots.json ; le backlog envoyé après le login est
+simulé par des blocs reçus d'un coup (--chunk 65536).
+"""
+
+import argparse, os, sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from _common import timeit, webapp  # noqa: E402
+from fake_cluster import load_lines  # noqa: E402
+
+
+def legacy_framing(chunks):
+    # Copie de l'implémentation historique (v2.91)
+    out, buf = [], ""
+    for data in chunks:
+        buf += data.decode("utf-8", errors="ignore")
+        while "\n" in buf:
+            line, buf = buf.split("\n", 1)
+            line = line.strip("\r ").strip()
+            if not line: continue
+            out.append(line)
+    return out
+
+
+def framer_framing(chunks):
+    out, fr = [], webapp.LineFramer()
+    for data in chunks:
+        out.extend(fr.feed(data))
+    return out
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--file", help="capture brute du cluster")
+    ap.add_argument("--mb", type=float, default=8, help="taille du flux (Mo)")
+    ap.add_argument("--chunk", type=int, default=4096, help="taille des blocs recv()")
+    args = ap.parse_args()
+
+    if args.file:
+        with open(args.file, "rb") as f:
+            stream = f.read()
+    else:
+        one = ("\r\n".join(load_lines()) + "\r\n").encode("utf-8")
+        stream = one * max(1, int(args.mb * 1024 * 1024 / len(one)))
+    chunks = [stream[i:i + args.chunk] for i in range(0, len(stream), args.chunk)]
+
+    a, b = legacy_framing(chunks), framer_framing(chunks)
+    if a != b:
+        # seule différence admise : caractères UTF-8 coupés entre deux blocs
+        print(f"attention : {sum(x != y for x, y in zip(a, b))} lignes diffèrent (UTF-8 coupé)")
+
+    mb = len(stream) / 1e6
+    t_old = timeit(legacy_framing, chunks, repeat=3)
+    t_new = timeit(framer_framing, chunks, repeat=3)
+    print(f"flux={mb:.1f} Mo lignes={len(b)} blocs={len(chunks)}x{args.chunk} o")
+    print(f"  str + split  : {t_old:7.3f} s  ({mb / t_old:8.1f} Mo/s)")
+    print(f"  LineFramer   : {t_new:7.3f} s  ({mb / t_new:8.1f} Mo/s)  x{t_old / t_new:.1f}")
+
+
+if __name__ == "__main__":
+    main()
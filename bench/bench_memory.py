@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Mémoire par spot (tracemalloc) : dict à 12-13 clés (v2.91) vs Spot compact.
+
+  python3 bench/bench_memory.py [--spots 100000]
+
+Les deux variantes sont construites à partir des mêmes lignes cluster
+(spots.json remis au format DX Spider, répété), avec le même parseur.
+"""
+
+import argparse, os, sys, tracemalloc
+from datetime import datetime, timezone
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from _common import bare_watcher  # noqa: E402
+from fake_cluster import load_lines  # noqa: E402
+
+
+def legacy_spot(w, line):
+    # forme v2.91 : un dict par spot, champs DXCC copiés, horodatage ISO
+    spotter, freq, call, comment, time_part = w._parse_fields_regex(line)
+    now = datetime.now(timezone.utc)
+    mode, band = w._detect_mode_band(freq, comment)
+    d = w.dxcc_lookup(call)
+    return {"utc": time_part or now.strftime("%H%MZ"), "freq": freq, "call": call, "mode": mode,
+            "band": band, "dxcc": d.get("country", ""), "grid": "", "spotter": spotter,
+            "lat": d.get("lat", 0), "lon": d.get("lon", 0), "timestamp": now.isoformat(),
+            "comment": comment}
+
+
+def measure(build, lines):
+    tracemalloc.start()
+    base = tracemalloc.get_traced_memory()[0]
+    kept = [build(l) for l in lines]
+    used = tracemalloc.get_traced_memory()[0] - base
+    tracemalloc.stop()
+    del kept
+    return used
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--spots", type=int, default=100000)
+    args = ap.parse_args()
+    w = bare_watcher()
+    src = [l for l in load_lines() if l.startswith("DX ")]
+    lines = [src[i % len(src)] for i in range(args.spots)]
+    # les lignes doivent être des objets distincts, comme à la lecture du socket
+    lines = [(l + " ")[:-1] for l in lines]
+
+    old = measure(lambda l: legacy_spot(w, l), lines)
+    new = measure(w.parse_dx_line, lines)
+    n = len(lines)
+    print(f"spots={n}")
+    print(f"  dict v2.91 : {old / n:7.1f} o/spot  ({old / 2**20:7.1f} Mio)")
+    print(f"  Spot       : {new / n:7.1f} o/spot  ({new / 2**20:7.1f} Mio)  -{100 * (1 - new / old):.0f} %")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Parseur de lignes DX : contrôle « golden » et benchmark.
+
+  python3 bench/bench_parser.py            # contrôle golden + fuzz + benchmark
+  python3 bench/bench_parser.py --check    # contrôle seul (code de sortie 1 au premier écart)
+  python3 bench/bench_parser.py --regen    # régénère parser_golden.json (parseur v2.91)
+
+parser_golden.json contient, pour chaque ligne du corpus (spots.json remis au
+format cluster, variantes manuelles, lignes de rspot.log.1), le découpage et
+le couple (mode, bande) produits par le parseur historique (regex DX_RE +
+chaîne if/elif). Le parseur courant doit les reproduire à l'identique.
+Le script sort en erreur au premier écart.
+"""
+
+import argparse, json, os, random, re, sys
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, HERE)
+from _common import ROOT, bare_watcher, timeit  # noqa: E402
+from fake_cluster import load_lines  # noqa: E402
+
+GOLDEN = os.path.join(HERE, "parser_golden.json")
+
+# --- Parseur historique (v2.91), référence du golden ---
+LEGACY_RE = re.compile(r'(?:DX (?:de|from)?\s*)([A-Z0-9/]+)[:\s]*\s*([0-9.]+)\s+([A-Z0-9/]+)\s*(.*?)\s*(\d{3,4}Z)?\s*(.*)', re.I)
+
+
+def legacy_fields(line):
+    if not line or not line.startswith("DX "):
+        return None
+    m = LEGACY_RE.match(line)
+    if not m: return None
+    return [m.group(1) or "", m.group(2) or "", m.group(3) or "",
+            ((m.group(4) or "") + " " + (m.group(6) or "")).strip(), m.group(5) or ""]
+
+
+def legacy_mode_band(freq_str, comment=""):
+    try:
+        freq = float(freq_str)
+    except Exception:
+        return "UNK", "UNK"
+    if 1800 <= freq <= 2000: band = "160m"
+    elif 3500 <= freq <= 4000: band = "80m"
+    elif 7000 <= freq <= 7300: band = "40m"
+    elif 10100 <= freq <= 10150: band = "30m"
+    elif 14000 <= freq <= 14350: band = "20m"
+    elif 18068 <= freq <= 18168: band = "17m"
+    elif 21000 <= freq <= 21450: band = "15m"
+    elif 24890 <= freq <= 24990: band = "12m"
+    elif 28000 <= freq <= 29700: band = "10m"
+    elif 50000 <= freq <= 54000: band = "6m"
+    elif 144000 <= freq <= 148000: band = "2m"
+    elif 430000 <= freq <= 440000: band = "70cm"
+    elif 10488000 <= freq <= 10492000: band = "QO-100"
+    else: band = "UNK"
+    up = (comment or "").upper()
+    if "QO-100" in up or "QO100" in up: band = "QO-100"
+    if "FT8" in up: mode = "FT8"
+    elif "FT4" in up: mode = "FT4"
+    elif "CW" in up or "QCW" in up: mode = "CW"
+    elif "SSB" in up or "USB" in up or "LSB" in up: mode = "SSB"
+    elif any(x in up for x in ("RTTY", "PSK", "MFSK")): mode = "DIGI"
+    else:
+        if band in ("160m", "80m", "40m") and (freq % 1000) < 200: mode = "CW"
+        elif band in ("20m", "15m", "10m") and (freq % 1000) < 200: mode = "CW"
+        elif (freq % 1000 > 70) and (freq % 1000 < 80): mode = "FT8"
+        else: mode = "SSB"
+    return mode, band
+
+
+# --- Corpus ---
+VARIANTS = [
+    "DX de EA5WU-#:   14025.0  K1ABC        CW 22 dB 25 WPM CQ             1234Z",
+    "DX de F5AA:      14025.0  3Y0J         1200Z",
+    "DX de F5AA:      14025.0  3Y0J",
+    "DX de f5aa:      7074.0   dl1abc       ft8 -12dB                      0101z",
+    "DX de F5AA :     28074.0  VK0/F5AA     QO-100 test                    2359Z",
+    "DX de F5AA::     14074.0  K1A          FT8                            0000Z",
+    "DX from F5AA:    14074.0  K1A          FT8                            0000Z",
+    "DX DE F5AA:      10489540.0  OD5ZZ     QO100 SSB                      1915Z",
+    "DX de N0CALL:    144300.0 W1AW/P       MS ssb via 12345Z              1500Z",
+    "DX de N0CALL:    3573.0   K1ABC-7      FT4                            1500Z",
+    "DX de N0CALL:    1.2.3    K1ABC        ?                              1500Z",
+    "DX de W3LPL:     21074.0  JA1XYZ       RTTY CQ TEST                   0745Z",
+    "DX de W3LPL:     18100.0  ZS6ABC       PSK31 and MFSK                 0745Z",
+    "DX de W3LPL:     50313.0  PY2XX                                        1830Z",
+    "DX de W3LPL:\t24940.0\tZL2AAA\tusb\t0745Z",
+    "DX de W3LPL:     14195.0  3Y0J         \x07\x07",
+    "DX de VERYLONGSPOTTER1234: 14000.0 K1ABC test 1234Z",
+    "WWV de W0MU <18Z> :   SFI=70, A=3, K=1",
+    "To ALL de F5LEN: bonjour",
+]
+
+
+def corpus():
+    lines = list(load_lines())
+    lines += VARIANTS
+    try:
+        with open(os.path.join(ROOT, "rspot.log.1"), encoding="utf-8", errors="replace") as f:
+            lines += [l.rstrip("\r\n") for l in f][:200]
+    except OSError:
+        pass
+    return lines
+
+
+def golden_record(line, fields, mb):
+    return {"line": line, "fields": fields, "mode_band": list(mb) if mb else None}
+
+
+def current_record(w, line):
+    if not line.startswith("DX "):
+        return golden_record(line, None, None)
+    f = w._parse_fields_fast(line) or w._parse_fields_regex(line)
+    f = list(f) if f else None
+    return golden_record(line, f, w._detect_mode_band(f[1], f[3]) if f else None)
+
+
+def legacy_record(line):
+    f = legacy_fields(line)
+    return golden_record(line, f, legacy_mode_band(f[1], f[3]) if f else None)
+
+
+def fuzz_comments(rng, n):
+    words = ["FT8", "FT4", "CW", "QCW", "SSB", "USB", "LSB", "RTTY", "PSK", "MFSK", "QO-100", "QO100",
+             "TNX", "QSL", "UP", "5", "dB", "M", "L", "S", "B", "U", "F", "T", "Q", "O", "-", "1", "0"]
+    for _ in range(n):
+        yield ("" if rng.random() < 0.3 else " ").join(rng.choice(words) for _ in range(rng.randint(0, 6)))
+
+
+def check(w):
+    with open(GOLDEN, encoding="utf-8") as f:
+        golden = json.load(f)
+    for g in golden:
+        cur = current_record(w, g["line"])
+        if cur != g:
+            sys.exit(f"Écart golden :\n  attendu {g}\n  obtenu  {cur}")
+    rng = random.Random(14)
+    n = 0
+    for c in fuzz_comments(rng, 20000):
+        for fr in ("1840.0", "7074.0", "14025.0", "14195.0", "10489540.0", "50313.5", "x"):
+            if w._detect_mode_band(fr, c) != legacy_mode_band(fr, c):
+                sys.exit(f"Écart mode/bande pour {fr!r} {c!r}")
+            n += 1
+    print(f"golden OK ({len(golden)} lignes), fuzz mode/bande OK ({n} cas)")
+
+
+def bench(w, lines):
+    dx = [l for l in lines if l.startswith("DX ")] * 50
+    fast = sum(1 for l in dx if w._parse_fields_fast(l))
+
+    def run_legacy():
+        for l in dx:
+            f = legacy_fields(l)
+            if f: legacy_mode_band(f[1], f[3])
+
+    def run_current():
+        for l in dx:
+            f = w._parse_fields_fast(l) or w._parse_fields_regex(l)
+            if f: w._detect_mode_band(f[1], f[3])
+
+    t_old, t_new = timeit(run_legacy, repeat=3), timeit(run_current, repeat=3)
+    t_full = timeit(lambda: [w.parse_dx_line(l) for l in dx], repeat=3)
+    n = len(dx)
+    print(f"lignes={n} chemin rapide={100 * fast / n:.1f} %")
+    print(f"  regex + if/elif      : {t_old * 1e6 / n:6.2f} µs/ligne")
+    print(f"  rapide + bisect      : {t_new * 1e6 / n:6.2f} µs/ligne  (x{t_old / t_new:.1f})")
+    print(f"  parse_dx_line complet: {t_full * 1e6 / n:6.2f} µs/ligne (DXCC + Spot)")
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--regen", action="store_true", help="régénère le golden avec le parseur historique")
+    ap.add_argument("--check", action="store_true", help="contrôle golden + fuzz seulement, sans benchmark")
+    args = ap.parse_args()
+    lines = corpus()
+    w = bare_watcher()
+    if args.regen:
+        with open(GOLDEN, "w", encoding="utf-8") as f:
+            json.dump([legacy_record(l) for l in lines], f, ensure_ascii=False, indent=1)
+        print(f"{GOLDEN} : {len(lines)} lignes")
+        return
+    check(w)
+    if not args.check:
+        bench(w, lines)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Taille et coût d'encodage de /spots.json : module json vs orjson, puis
+corps brut vs gzip vs brotli (si le module brotli est installé).
+
+  python3 bench/bench_payload.py [--sizes 200,2000,20000]
+
+Pour chaque taille de fenêtre, --sizes spots synthétiques (indicatifs tous
+différents, comme bench/fake_cluster.py --synthetic) passent par
+parse_dx_line et forment la charge de /spots.json ({"spots", "map_spots",
+"seq"}). Encodages comparés : jsonify (module json, réglages de Flask),
+json compact (json_bytes sans orjson) et orjson ; vérifie que les trois
+décodent à l'identique. Compressions : gzip niveau GZIP_LEVEL et brotli
+qualité BROTLI_QUALITY, taille et temps.
+"""
+
+import argparse, gzip, json, os, sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from _common import bare_watcher, timeit, webapp  # noqa: E402
+from fake_cluster import synthetic_lines  # noqa: E402
+
+
+def payload(w, n):
+    L = [w.parse_dx_line(l).to_dict() for l in synthetic_lines(n)]
+    for i, s in enumerate(L): s["seq"] = n - i
+    return {"spots": L, "map_spots": L[:webapp.MAX_MAP_SPOTS], "seq": n}
+
+
+def encoders():
+    out = [("jsonify (json)", lambda d: json.dumps(d, sort_keys=True, separators=(",", ":")).encode("utf-8")),
+           ("json compact", lambda d: json.dumps(d, ensure_ascii=False, separators=(",", ":")).encode("utf-8"))]
+    if webapp.orjson is not None:
+        out.append(("orjson", webapp.orjson.dumps))
+    return out
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--sizes", default="200,2000,20000", help="spots dans la fenêtre")
+    args = ap.parse_args()
+    w = bare_watcher()
+    print(f"orjson {'oui' if webapp.orjson else 'absent'} | brotli {'oui' if webapp.brotli else 'absent'} "
+          f"| gzip niveau {webapp.GZIP_LEVEL} | brotli qualité {webapp.BROTLI_QUALITY}")
+    for n in (int(x) for x in args.sizes.split(",")):
+        data = payload(w, n)
+        print(f"\nfenêtre={n} spots")
+        ref, body = None, None
+        for name, enc in encoders():
+            b = enc(data)
+            if ref is None:
+                ref = json.loads(b)
+            elif json.loads(b) != ref:
+                sys.exit(f"Écart d'encodage : {name}")
+            body = b  # le dernier (le plus rapide disponible) sert aux compressions
+            t = timeit(enc, data)
+            print(f"  encodage {name:<15}: {t * 1e3:8.2f} ms  {len(b):>10} o")
+        print(f"  décodage json           : {timeit(json.loads, body) * 1e3:8.2f} ms")
+        if webapp.orjson is not None:
+            print(f"  décodage orjson         : {timeit(webapp.orjson.loads, body) * 1e3:8.2f} ms")
+        comps = [("gzip", lambda b: gzip.compress(b, webapp.GZIP_LEVEL))]
+        if webapp.brotli is not None:
+            comps.append(("brotli", lambda b: webapp.brotli.compress(b, quality=webapp.BROTLI_QUALITY)))
+        for name, comp in comps:
+            z = comp(body)
+            print(f"  {name:<24}: {timeit(comp, body) * 1e3:8.2f} ms  {len(z):>10} o  "
+                  f"({len(z) / len(body):.1%} du brut)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Fenêtre de spots : deque vs SpotColumns (SPOTS_STORE=columnar) côté écriture,
+SpotColumns (fenêtre vive, sous verrou) vs vue publiée (FrozenWindow) côté lecture.
+
+  python3 bench/bench_store.py [--spots 200000] [--chunk 16]
+
+Remplit une fenêtre de --spots spots (lignes de spots.json répétées, comme
+24 h de trafic), vérifie que la vue publiée renvoie les mêmes spots que les
+colonnes, puis mesure l'ajout (avec éviction et une publication de vue par
+bloc de --chunk spots, comme _cluster_reader), les filtres, ?since= et
+/stats.json filtré.
+"""
+
+import argparse, os, sys, threading
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from _common import bare_watcher, timeit, webapp  # noqa: E402
+from fake_cluster import load_lines  # noqa: E402
+
+QUERIES = [{"band": "20m"}, {"band": "40m", "mode": "CW"}, {"call": "K"}, {"dxcc": "france"},
+           {"continent": "EU"}, {"continent": "OC", "band": "15m"}]
+
+
+def window_watcher(store, dxcc_map, maxlen):
+    webapp.SPOTS_STORE, webapp.MAX_SPOTS = store, maxlen
+    w = bare_watcher(dxcc_map)
+    w.lock = threading.RLock()
+    w.spots = w._new_spot_store()
+    w.stats = webapp.SpotStats()
+    w.spot_seq = w.spots_version = w.marked_total = 0
+    w.mtimes = {"spots": 0}
+    w.view, w._pending, w._publish_lock = webapp.SpotView(), [], threading.Lock()
+    return w
+
+
+def fill(w, spots, chunk):
+    for k in range(0, len(spots), chunk):
+        for s in spots[k:k + chunk]: w._append_spot(s)
+        w._publish_view()
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--spots", type=int, default=200000)
+    ap.add_argument("--chunk", type=int, default=16, help="spots par publication de vue")
+    args = ap.parse_args()
+    n = args.spots
+    ref = bare_watcher()
+    src = [ref.parse_dx_line(l) for l in load_lines() if l.startswith("DX ")]
+    copies = lambda k, off=0: [webapp.Spot.from_dict(src[(off + i) % len(src)].to_dict()) for i in range(k)]
+
+    print(f"fenêtre={n} spots, une vue publiée tous les {args.chunk} spots")
+    ws = {}
+    for store in ("deque", "columnar"):
+        w = ws[store] = window_watcher(store, ref.dxcc_map, n)
+        fill(w, copies(n), 1000)
+        extra = copies(n // 4, n)
+        t = timeit(lambda: fill(w, extra, args.chunk), repeat=1)
+        print(f"  ajout + publication ({store:<8}): {t / len(extra) * 1e6:7.2f} µs/spot")
+
+    w = ws["columnar"]
+    cols, view = w.spots, w.view.spots
+    since = w.spot_seq - 500
+    for q in QUERIES:
+        if [s.seq for s in cols.select(q)] != [s.seq for s in view.select(q)] or cols.count(q) != view.count(q):
+            sys.exit(f"Écart colonnes/vue : {q}")
+    if [s.seq for s in cols.select({}, since)] != [s.seq for s in view.select({}, since)]:
+        sys.exit("Écart colonnes/vue : ?since=")
+    print(f"  résultats identiques (colonnes vives / vue), {len(view.chunks)} blocs dans la vue")
+    for name, fn in (("filtres", lambda x: [x.select(q) for q in QUERIES]),
+                     ("?since= (500)", lambda x: x.select({}, since)),
+                     ("stats filtrées", lambda x: [x.count(q) for q in QUERIES])):
+        k = 1 if name.startswith("?") else len(QUERIES)
+        t_old, t_new = timeit(fn, cols, repeat=3) / k, timeit(fn, view, repeat=3) / k
+        unit, mult = ("µs", 1e6) if t_old < 1e-3 else ("ms", 1e3)
+        print(f"  {name:<17}: colonnes {t_old * mult:9.2f} {unit}   vue {t_new * mult:9.2f} {unit}  x{t_old / t_new:.1f}")
+
+
+if __name__ == "__main__":
+    main()
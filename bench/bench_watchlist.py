@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Coût du test watchlist par spot : un WatchlistMatcher unique (motifs de tous
+les clients réunis) vs une liste de motifs testée client par client.
+
+  python3 bench/bench_watchlist.py [--clients 1,10,100,1000] [--patterns 20]
+"""
+
+import argparse, fnmatch, os, random, sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from _common import bare_watcher, timeit, webapp  # noqa: E402
+from fake_cluster import load_lines  # noqa: E402
+
+
+def client_patterns(rng, calls, n):
+    out = []
+    for _ in range(n):
+        c = rng.choice(calls)
+        out.append(rng.choice([c, c[:3] + "*", c[:2] + "?" + c[3:], "*/MM"]))
+    return out
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--clients", default="1,10,100,1000")
+    ap.add_argument("--patterns", type=int, default=20, help="motifs par client")
+    args = ap.parse_args()
+    w = bare_watcher()
+    calls = [s.call for s in (w.parse_dx_line(l) for l in load_lines()) if s]
+    rng = random.Random(18)
+    print(f"spots={len(calls)} motifs/client={args.patterns}")
+    for n in map(int, args.clients.split(",")):
+        per_client = [client_patterns(rng, calls, args.patterns) for _ in range(n)]
+        matcher = webapp.WatchlistMatcher({p for pats in per_client for p in pats})
+
+        def per_client_scan():
+            for c in calls:
+                for pats in per_client:
+                    any(fnmatch.fnmatchcase(c, p) for p in pats)
+
+        def single_matcher():
+            for c in calls:
+                matcher.match(c)
+
+        t_old = timeit(per_client_scan, repeat=1) / len(calls)
+        t_new = timeit(single_matcher, repeat=3) / len(calls)
+        print(f"  clients={n:5d} : par client {t_old * 1e6:10.1f} µs/spot   matcher unique {t_new * 1e6:6.2f} µs/spot")
+
+
+if __name__ == "__main__":
+    main()
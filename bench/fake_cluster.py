@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Faux cluster DX (telnet) pour les essais locaux : rejoue des lignes « DX de »
+à chaque client connecté, après lecture de son indicatif de login.
+
+  python3 bench/fake_cluster.py --port 7300 [--file capture.txt] [--rate 50] [--loop]
+  python3 bench/fake_cluster.py --port 7300 --synthetic 100000 --rate 0 --stamp --close
+
+Sans --file, les lignes sont reconstruites depuis spots.json au format
+DX Spider ; --synthetic N génère N spots d'indicatifs tous différents (pas de
+fusion par le dédoublonnage). --rate 0 envoie au débit du socket ; aux débits
+élevés les lignes partent par blocs de --burst (par défaut ~100 blocs/s).
+--stamp place l'heure d'envoi (µs depuis l'epoch) dans le commentaire des
+lignes synthétiques (« t1760000000000000 ») : bench/bench_e2e.py en déduit
+la latence jusqu'à l'affichage. --close ferme la connexion après le rejeu.
+
+  CLUSTER_HOST=127.0.0.1 CLUSTER_PORT=7300 python3 src/webapp.py
+
+Plusieurs instances (ports différents) simulent plusieurs clusters :
+
+  CLUSTERS=127.0.0.1:7300,127.0.0.1:7301 python3 src/webapp.py
+"""
+
+import argparse, asyncio, json, os, random, re, time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TIME_TAIL = re.compile(r"\s*\d{4}Z\s*$")
+STAMP = "#" * 16  # remplacé à l'envoi par time_ns() // 1000 (16 chiffres)
+PREFIXES = ("K", "W", "N", "VE", "DL", "F", "G", "EA", "I", "ON", "PA", "SP", "OK", "UA", "JA",
+            "BY", "VK", "ZL", "PY", "LU", "ZS", "5B", "9A", "3Y0", "VP8", "FT5", "KH1", "P5")
+SEGMENTS = ((1820, 1840, "CW"), (3500, 3570, "CW"), (3573, 3574, "FT8"), (7000, 7040, "CW"),
+            (7074, 7075, "FT8"), (7130, 7200, "SSB"), (10100, 10130, "CW"), (14000, 14060, "CW"),
+            (14074, 14075, "FT8"), (14080, 14081, "FT4"), (14150, 14350, "SSB"), (18068, 18100, "CW"),
+            (21000, 21070, "CW"), (21074, 21075, "FT8"), (21200, 21450, "SSB"), (24890, 24915, "CW"),
+            (28000, 28070, "CW"), (28074, 28075, "FT8"), (28300, 28600, "SSB"), (50313, 50314, "FT8"))
+
+
+def format_dx_line(spot):
+    """Spot (dict au format spots.json) -> ligne DX Spider à colonnes fixes."""
+    comment = TIME_TAIL.sub("", (spot.get("comment") or "").replace("\x07", "")).strip()
+    utc = (spot.get("utc") or "0000Z").rstrip("Z")[:4] + "Z"
+    spotter = (spot.get("spotter") or "NOCALL") + ":"
+    freq = str(spot.get("freq") or "0.0")
+    return f"DX de {spotter:<10}{freq:>8}  {spot.get('call', ''):<13}{comment[:30]:<30} {utc}"
+
+
+def load_lines(path=None):
+    if path:
+        with open(path, encoding="utf-8", errors="replace") as f:
+            return [l.rstrip("\r\n") for l in f if l.strip()]
+    with open(os.path.join(ROOT, "spots.json"), encoding="utf-8") as f:
+        spots = json.load(f)
+    return [format_dx_line(s) for s in reversed(spots)]  # du plus ancien au plus récent
+
+
+def _suffix(i):
+    # i en base 26 (A-Z), 3 lettres au moins : AAA, AAB, ..., ZZZ, BAAA, ...
+    s = ""
+    while True:
+        i, r = divmod(i, 26)
+        s = chr(65 + r) + s
+        if not i and len(s) >= 3: return s
+
+
+def synthetic_lines(n, seed=1, stamp=False, first=0):
+    """N lignes « DX de » réalistes (bandes, modes, préfixes variés), indicatifs uniques à partir de first."""
+    rng = random.Random(seed)
+    out = []
+    for i in range(first, first + n):
+        lo, hi, mode = rng.choice(SEGMENTS)
+        freq = rng.uniform(lo, hi)
+        comment = f"{mode} t{STAMP}" if stamp else f"{mode} {rng.randint(-20, 25):+d} dB"
+        out.append(format_dx_line({
+            "spotter": f"{rng.choice(PREFIXES)}{rng.randint(1, 9)}{_suffix(rng.randrange(17576))}",
+            "freq": f"{freq:.1f}", "call": f"{rng.choice(PREFIXES)}{i % 10}{_suffix(i)}",
+            "comment": comment, "utc": f"{rng.randrange(24):02d}{rng.randrange(60):02d}Z"}))
+    return out
+
+
+def make_blocks(lines, burst):
+    return ["".join(l + "\r\n" for l in lines[i:i + burst]) for i in range(0, len(lines), burst)]
+
+
+async def serve_client(reader, writer, lines, rate, loop_forever, burst=0, stamp=False, close=False):
+    peer = writer.get_extra_info("peername")
+    try:
+        writer.write(b"login: ")
+        await writer.drain()
+        login = (await asyncio.wait_for(reader.readline(), 30)).decode(errors="ignore").strip()
+        writer.write(f"Hello {login}, fake cluster\r\n".encode())
+        burst = burst or (max(1, int(rate / 100)) if rate > 0 else 256)
+        blocks = make_blocks(lines, burst)
+        delay = burst / rate if rate > 0 else 0
+        loop = asyncio.get_running_loop()
+        while True:
+            t_next = loop.time()
+            for b in blocks:
+                if stamp:
+                    b = b.replace(STAMP, str(time.time_ns() // 1000))
+                writer.write(b.encode("utf-8"))
+                await writer.drain()
+                if delay:
+                    t_next += delay
+                    await asyncio.sleep(max(0.0, t_next - loop.time()))
+            if not loop_forever: break
+        if not close:
+            await asyncio.sleep(3600)  # garde la connexion ouverte comme un vrai cluster
+    except (ConnectionError, asyncio.TimeoutError):
+        pass
+    finally:
+        print(f"[fake] {peer} déconnecté")
+        writer.close()
+
+
+async def main_async(args):
+    lines = (synthetic_lines(args.synthetic, stamp=args.stamp, first=args.first) if args.synthetic
+             else load_lines(args.file))
+    server = await asyncio.start_server(
+        lambda r, w: serve_client(r, w, lines, args.rate, args.loop, args.burst, args.stamp, args.close),
+        args.host, args.port)
+    print(f"[fake] {len(lines)} lignes, écoute sur {args.host}:{args.port}", flush=True)
+    async with server:
+        await server.serve_forever()
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=7300)
+    ap.add_argument("--file", help="capture texte (une ligne cluster par ligne)")
+    ap.add_argument("--rate", type=float, default=20, help="lignes/s par client (0 = sans limite)")
+    ap.add_argument("--loop", action="store_true", help="rejoue la capture en boucle")
+    ap.add_argument("--synthetic", type=int, default=0, help="N lignes synthétiques au lieu de la capture")
+    ap.add_argument("--first", type=int, default=0, help="numéro du premier indicatif synthétique")
+    ap.add_argument("--burst", type=int, default=0, help="lignes par écriture (0 = selon --rate)")
+    ap.add_argument("--stamp", action="store_true", help="heure d'envoi dans le commentaire (synthétique)")
+    ap.add_argument("--close", action="store_true", help="ferme la connexion après le rejeu")
+    try:
+        asyncio.run(main_async(ap.parse_args()))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
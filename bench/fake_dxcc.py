@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Faux serveur de table DXCC pour les essais de dxcc_worker : sert un JSON
+avec ETag / Last-Modified et répond 304 aux GET conditionnels.
+
+  python3 bench/fake_dxcc.py --port 8079 [--file table.json]
+  DXCC_REMOTE_URL=http://127.0.0.1:8079/dxcc.json python3 src/webapp.py
+
+Sans --file, la table est construite depuis cty.csv (format accepté par
+_coerce_any_dxcc_format). Avec --file, le fichier est relu s'il change :
+le GET suivant du watcher reçoit alors 200 et la nouvelle table.
+"""
+
+import argparse, hashlib, json, os, sys
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from _common import SRC, load_cty_csv  # noqa: E402
+
+
+class Table:
+    def __init__(self, path):
+        self.path, self.mtime = path, None
+        self.body = self.etag = self.last_modified = None
+        self.load()
+
+    def load(self):
+        if self.path:
+            mtime = os.path.getmtime(self.path)
+            if mtime == self.mtime: return
+            with open(self.path, "rb") as f:
+                body = f.read()
+        else:
+            if self.body is not None: return
+            mtime = os.path.getmtime(os.path.join(SRC, "cty.csv"))
+            body = json.dumps(load_cty_csv(), ensure_ascii=False).encode("utf-8")
+        self.mtime, self.body = mtime, body
+        self.etag = '"' + hashlib.sha1(body).hexdigest()[:16] + '"'
+        self.last_modified = formatdate(mtime, usegmt=True)
+        print(f"[fake-dxcc] table {len(body)} o, ETag {self.etag}")
+
+
+def make_handler(table):
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            table.load()
+            if self.headers.get("If-None-Match") == table.etag:
+                self.send_response(304)
+                self.send_header("ETag", table.etag)
+                self.end_headers()
+                return
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(table.body)))
+            self.send_header("ETag", table.etag)
+            self.send_header("Last-Modified", table.last_modified)
+            self.end_headers()
+            self.wfile.write(table.body)
+
+        def log_message(self, fmt, *args):
+            print(f"[fake-dxcc] {self.address_string()} {fmt % args}")
+    return Handler
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=8079)
+    ap.add_argument("--file", help="table JSON à servir (relue si modifiée)")
+    args = ap.parse_args()
+    srv = ThreadingHTTPServer((args.host, args.port), make_handler(Table(args.file)))
+    print(f"[fake-dxcc] écoute sur http://{args.host}:{args.port}/dxcc.json")
+    try:
+        srv.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -9,14 +9,29 @@ Nouveautés v2.91 :
 Conserve 2.86 : carte, watchlist, filtres bande/mode, charts canvas, RSS, export CSV, palettes.
 """
 
-import os, json, csv, re, socket, signal, logging, threading, time
-from datetime import datetime, timezone
-from collections import deque, defaultdict
+import os, sys, json, csv, re, socket, signal, logging, threading, time, queue, sqlite3, hashlib, gzip, asyncio, atexit, fnmatch
+from itertools import compress, chain, islice, repeat
+from array import array
+from operator import and_
+from bisect import bisect_left, bisect_right
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone, timedelta
+from collections import deque, defaultdict, OrderedDict, Counter
 from typing import Dict, List, Optional, Tuple
 
 import requests
 import feedparser
-from flask import Flask, jsonify, Response, render_template_string
+from flask import Flask, jsonify, Response, render_template_string, request
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson  # optionnel : encodage / décodage JSON plus rapide
+except ImportError:
+    orjson = None
+try:
+    import brotli  # optionnel : Content-Encoding: br
+except ImportError:
+    brotli = None
 
 # =========================
 # Config
@@ -28,19 +43,57 @@ HTTP_PORT = int(os.environ.get("PORT", 8000))
 CLUSTER_PRIMARY = (os.environ.get("CLUSTER_HOST", "dxfun.com"), int(os.environ.get("CLUSTER_PORT", 8000)))
 CLUSTER_FALLBACK = (os.environ.get("CLUSTER_FALLBACK_HOST", "f5len.org"), int(os.environ.get("CLUSTER_FALLBACK_PORT", 8000)))
 CLUSTER_CALLSIGN = os.environ.get("CLUSTER_CALLSIGN", "F1ABC")
+# Multi-cluster (asyncio) : "host:port[:login],host:port[:login],..." ; vide = primaire/fallback
+CLUSTERS = os.environ.get("CLUSTERS", "")
 
 # Données / limites
 MAX_SPOTS = int(os.environ.get("MAX_SPOTS", 200))
+SPOTS_STORE = os.environ.get("SPOTS_STORE", "deque").lower()      # "deque" | "columnar" (grandes fenêtres)
 MAX_MAP_SPOTS = int(os.environ.get("MAX_MAP_SPOTS", 30))
 SPOTS_FILE = os.environ.get("SPOTS_FILE", "spots.json")
+SPOTS_BACKEND = os.environ.get("SPOTS_BACKEND", "json").lower()   # "json" | "journal"
+SPOTS_JOURNAL = os.environ.get("SPOTS_JOURNAL", "spots.jsonl")
+JOURNAL_KEEP  = int(os.environ.get("JOURNAL_KEEP", MAX_SPOTS))     # lignes gardées après compactage
+HISTORY_DB    = os.environ.get("HISTORY_DB", "")                   # ex: history.db (vide = désactivé)
+HISTORY_BATCH = int(os.environ.get("HISTORY_BATCH", 200))          # spots par transaction
+SSE_QUEUE_SIZE = int(os.environ.get("SSE_QUEUE_SIZE", 500))       # événements en attente par client /stream
+SSE_KEEPALIVE  = 15                                                # sec entre deux commentaires keep-alive
+SNAPSHOT_GZIP = os.environ.get("SNAPSHOT_GZIP", "1") != "0"       # pré-compression des snapshots
+GZIP_MIN_SIZE = int(os.environ.get("COMPRESS_MIN_SIZE", 1024))     # octets : en dessous, ni gzip ni brotli
+GZIP_LEVEL    = 6                                                  # réponses gzip (snapshots et dynamiques)
+BROTLI_QUALITY = 5                                                 # réponses br (si le module brotli est installé)
+JSON_BACKEND  = os.environ.get("JSON_BACKEND", "auto").lower()     # "auto" (orjson si installé) | "json"
+COMPRESS_TYPES = ("application/json", "text/csv")                  # réponses compressées à la volée
+STATS_MINUTES = int(os.environ.get("STATS_MINUTES", 180))  # cumuls par minute conservés
+STATS_HOURS   = int(os.environ.get("STATS_HOURS", 168))    # cumuls par heure conservés (7 j)
+DEDUP_WINDOW   = float(os.environ.get("DEDUP_WINDOW", 300))    # sec ; 0 = pas de dé-duplication
+DEDUP_FREQ_TOL = float(os.environ.get("DEDUP_FREQ_TOL", 1.0))   # kHz
+HISTORY_MAX_LIMIT = 1000                                           # lignes max par page /history.json
+WATCHLIST_FILE   = os.environ.get("WATCHLIST_FILE", "watchlist.json")  # motifs d'alerte (rechargé à chaud)
+WATCHLIST_RELOAD = 5                                               # sec entre deux vérifications du fichier
+ALERTS_KEEP      = 200                                             # alertes gardées pour /alerts.json
+MOST_WANTED_FILE = os.environ.get("MOST_WANTED_FILE", "data/mostwanted.json")  # liste classée (rechargée à chaud)
+WANTED_HITS_KEEP = 200                                             # spots « wanted » gardés pour /wanted/hits.json
 DXCC_FILE  = os.environ.get("DXCC_FILE",  "dxcc.json")
 LOG_FILE   = os.environ.get("LOG_FILE",   "rspot.log")
-
-# DXCC : URL (modifiable)
-DXCC_REMOTE_URL = os.environ.get(
-    #"DXCC_REMOTE_URL",
-    ""
-)
+SAVE_INTERVAL = float(os.environ.get("SAVE_INTERVAL", 10))  # sec max entre deux écritures de spots.json
+SAVE_EVERY_N  = int(os.environ.get("SAVE_EVERY_N", 50))     # ou dès N nouveaux spots
+DXCC_CACHE_SIZE = int(os.environ.get("DXCC_CACHE_SIZE", 4096))  # indicatifs mémorisés
+
+# Déploiement (gunicorn / waitress) : "all" = tout dans un seul process ;
+# "ingest" = clusters, RSS, persistance, publie dans SHARED_DB ;
+# "web" = workers HTTP sans état, relisent SHARED_DB
+ROLE        = os.environ.get("ROLE", "all").lower()
+SHARED_DB   = os.environ.get("SHARED_DB", "")                    # ex: state.db (requis pour ingest/web)
+SHARED_POLL = float(os.environ.get("SHARED_POLL", 0.5))          # sec entre deux relectures (web)
+SHARED_STATUS_EVERY = 5                                            # sec entre deux publications du statut
+HTTP_SERVER = os.environ.get("HTTP_SERVER", "flask").lower()      # "flask" | "waitress" (python3 webapp.py)
+HTTP_THREADS = int(os.environ.get("HTTP_THREADS", 32))             # waitress : chaque client /stream garde un thread
+
+# DXCC : URL (modifiable) ; vide = pas de mise à jour en ligne
+DXCC_REMOTE_URL = os.environ.get("DXCC_REMOTE_URL", "")
+DXCC_META_FILE  = DXCC_FILE + ".meta"                              # ETag / Last-Modified / date de MAJ
+DXCC_REFRESH_HOURS = float(os.environ.get("DXCC_REFRESH_HOURS", 24))  # entre deux GET conditionnels
 
 # RSS
 RSS_FEEDS = [
@@ -48,6 +101,8 @@ RSS_FEEDS = [
     "https://clublog.freshdesk.com/support/discussions/topics/3000175080.rss"
 ]
 RSS_UPDATE_INTERVAL = 300  # sec
+RSS_TIMEOUT    = float(os.environ.get("RSS_TIMEOUT", 10))           # sec par flux (connexion / lecture)
+RSS_CACHE_FILE = os.environ.get("RSS_CACHE_FILE", "data/rss_cache.json")  # entrées + ETag par flux
 
 # =========================
 # Logging
@@ -63,46 +118,1732 @@ try:
 except Exception as e:
     logger.warning(f"RotatingFileHandler unavailable: {e}")
 
+# =========================
+# Cache LRU borné
+# =========================
+class LRUCache:
+    """Cache LRU thread-safe avec compteurs hits / misses / evictions."""
+    def __init__(self, maxsize: int):
+        self.maxsize = max(0, maxsize)
+        self._data: "OrderedDict[str, Dict]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = self.misses = self.evictions = 0
+
+    def get(self, key):
+        with self._lock:
+            v = self._data.get(key)
+            if v is None:
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return v
+
+    def put(self, key, value):
+        if self.maxsize <= 0: return
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {"size": len(self._data), "maxsize": self.maxsize,
+                    "hits": self.hits, "misses": self.misses, "evictions": self.evictions}
+
+# =========================
+# Spot compact
+# =========================
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+_intern = sys.intern
+
+class Spot:
+    """
+    Spot en mémoire : __slots__, chaînes répétées internées (bande, mode,
+    indicatifs...), référence vers l'entrée DXCC partagée au lieu de copier
+    pays/lat/lon/continent, horodatage en microsecondes entières.
+    Accès façon dict (get / [] ) pour le code existant ; to_dict() donne le
+    JSON historique, uniquement en sortie (API, fichiers, SSE).
+    """
+    __slots__ = ("utc", "freq", "call", "mode", "band", "spotter", "comment",
+                 "entry", "ts_us", "seq", "nspotters", "cont", "grid", "wanted")
+    # Entrées DXCC reconstruites au chargement de spots.json : une par pays
+    _entry_pool: Dict[Tuple, Dict] = {}
+
+    def __init__(self, utc: str, freq: str, call: str, mode: str, band: str, spotter: str,
+                 comment: str, entry: Dict, ts_us: int, seq: int = 0, nspotters: int = 0, grid: str = ""):
+        self.utc, self.freq, self.call = _intern(utc), freq, _intern(call)
+        self.mode, self.band, self.spotter = _intern(mode), _intern(band), _intern(spotter)
+        self.comment, self.entry, self.ts_us = comment, entry, ts_us
+        self.seq, self.nspotters, self.cont, self.grid = seq, nspotters, None, grid
+        self.wanted = 0  # rang dans la liste most-wanted (0 = non)
+
+    @classmethod
+    def from_dict(cls, d: Dict) -> "Spot":
+        if isinstance(d, Spot): return d
+        try: lat, lon = float(d.get("lat", 0) or 0), float(d.get("lon", 0) or 0)
+        except (TypeError, ValueError): lat = lon = 0.0
+        key = (d.get("dxcc", "") or "", lat, lon, d.get("continent", "") or "")
+        entry = cls._entry_pool.get(key)
+        if entry is None:
+            entry = cls._entry_pool[key] = {"country": _intern(key[0]), "lat": lat, "lon": lon, "continent": key[3]}
+        try:
+            dt = datetime.fromisoformat(d.get("timestamp", ""))
+            if dt.tzinfo is None: dt = dt.replace(tzinfo=timezone.utc)
+            ts_us = (dt - _EPOCH) // timedelta(microseconds=1)
+        except (TypeError, ValueError):
+            ts_us = int(time.time() * 1e6)
+        seq = d.get("seq")
+        s = cls(d.get("utc", "") or "", str(d.get("freq", "") or ""), d.get("call", "") or "",
+                d.get("mode", "UNK") or "UNK", d.get("band", "UNK") or "UNK", d.get("spotter", "") or "",
+                d.get("comment", "") or "", entry, ts_us,
+                seq if isinstance(seq, int) else 0, int(d.get("nspotters", 0) or 0), d.get("grid", "") or "")
+        s.wanted = int(d.get("wanted", 0) or 0)
+        return s
+
+    @property
+    def timestamp(self) -> str:
+        return (_EPOCH + timedelta(microseconds=self.ts_us)).isoformat()
+
+    def get(self, key: str, default=None):
+        if key in ("utc", "freq", "call", "mode", "band", "spotter", "comment", "grid"):
+            return getattr(self, key)
+        if key == "dxcc": return self.entry.get("country", "")
+        if key == "continent": return self.cont if self.cont is not None else self.entry.get("continent", "")
+        if key in ("lat", "lon"): return self.entry.get(key, 0)
+        if key == "timestamp": return self.timestamp
+        if key == "seq": return self.seq
+        if key == "nspotters": return self.nspotters or default
+        if key == "wanted": return self.wanted or default
+        return default
+
+    def __getitem__(self, key: str):
+        v = self.get(key, KeyError)
+        if v is KeyError: raise KeyError(key)
+        return v
+
+    def __setitem__(self, key: str, value):
+        if key == "continent": self.cont = value
+        elif key in ("seq", "nspotters", "grid", "comment", "utc", "wanted"): setattr(self, key, value)
+        else: raise KeyError(key)
+
+    def to_dict(self) -> Dict:
+        e = self.entry
+        d = {
+            "utc": self.utc, "freq": self.freq, "call": self.call, "mode": self.mode, "band": self.band,
+            "dxcc": e.get("country", ""), "continent": self.get("continent"), "grid": self.grid,
+            "spotter": self.spotter, "lat": e.get("lat", 0), "lon": e.get("lon", 0),
+            "timestamp": self.timestamp, "comment": self.comment, "seq": self.seq,
+        }
+        if self.nspotters: d["nspotters"] = self.nspotters
+        if self.wanted: d["wanted"] = self.wanted
+        return d
+
+    def __repr__(self):
+        return f"Spot({self.to_dict()!r})"
+
+def spot_json(s) -> Dict:
+    return s.to_dict() if isinstance(s, Spot) else s
+
+_ORJSON = orjson is not None and JSON_BACKEND != "json"
+
+def json_bytes(data, indent: Optional[int] = None) -> bytes:
+    """JSON UTF-8 (compact, ou indenté pour les fichiers) ; orjson si disponible."""
+    if _ORJSON:
+        try:
+            return orjson.dumps(data, option=orjson.OPT_INDENT_2 if indent else 0)
+        except TypeError:  # type que orjson refuse (clé non str...) : module json
+            pass
+    if indent:
+        return json.dumps(data, ensure_ascii=False, indent=indent).encode("utf-8")
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+def json_parse(raw):
+    """bytes / str -> objet ; orjson si disponible."""
+    return orjson.loads(raw) if _ORJSON else json.loads(raw)
+
+def compress_body(body: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    return gzip.compress(body, GZIP_LEVEL)
+
+def accepted_encoding(offers: Optional[Tuple[str, ...]] = None) -> Optional[str]:
+    """
+    Content-Encoding négocié pour la requête courante : l'offre de plus haute
+    qualité (q) dans Accept-Encoding, br avant gzip à égalité ; q=0 = refusé,
+    « * » vaut pour les codages non cités. None : corps non compressé.
+    """
+    if offers is None:
+        offers = ("br", "gzip") if brotli is not None else ("gzip",)
+    acc = request.accept_encodings
+    best = max(offers, key=lambda e: acc[e])  # premier des ex aequo
+    return best if acc[best] > 0 else None
+
+class FastJSONProvider(DefaultJSONProvider):
+    """jsonify() encodé par json_bytes (orjson) ; installé seulement si orjson est présent."""
+    def dumps(self, obj, **kw) -> str:
+        return super().dumps(obj, **kw) if kw else json_bytes(obj).decode("utf-8")
+
+    def loads(self, s, **kw):
+        return super().loads(s, **kw) if kw else json_parse(s)
+
+    def response(self, *args, **kwargs) -> Response:
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(json_bytes(obj), mimetype=self.mimetype)
+
+# =========================
+# Fenêtre de spots en colonnes (SPOTS_STORE=columnar)
+# =========================
+class StringTable:
+    """Chaîne <-> identifiant entier, compté par référence ; un id libéré est réutilisé."""
+    def __init__(self):
+        self.ids: Dict[str, int] = {}
+        self.strings: List[Optional[str]] = []
+        self.refs = array("I")
+        self._free: List[int] = []
+
+    def add(self, s: str) -> int:
+        i = self.ids.get(s)
+        if i is None:
+            if self._free:
+                i = self._free.pop()
+                self.strings[i] = s
+            else:
+                i = len(self.strings)
+                self.strings.append(s)
+                self.refs.append(0)
+            self.ids[s] = i
+        self.refs[i] += 1
+        return i
+
+    def release(self, i: int):
+        self.refs[i] -= 1
+        if not self.refs[i]:
+            del self.ids[self.strings[i]]
+            self.strings[i] = None
+            self._free.append(i)
+
+    def matching(self, prefix: str) -> set:
+        return {i for s, i in self.ids.items() if s.startswith(prefix)}
+
+class SpotColumns:
+    """
+    Anneau de taille fixe remplaçant la deque de self.spots pour les longues
+    fenêtres (24 h de trafic mondial). Les objets Spot restent la ligne
+    (sérialisation, mise à jour nspotters) ; à côté, des colonnes `array` :
+    seq, et bande / mode / continent / indicatif / pays codés via des
+    StringTable. Filtres et comptages parcourent ces colonnes en C
+    (map / compress / Counter) au lieu d'une boucle Python par spot, ?since=
+    est une bisection sur seq. Même interface que la deque utilisée ici :
+    itération du plus récent au plus ancien, [i], len, appendleft, maxlen.
+    """
+    CODED = ("band", "mode", "continent", "call", "dxcc")
+
+    def __init__(self, maxlen: int, items=()):
+        self.maxlen = cap = max(1, maxlen)
+        self.rows: List[Optional[Spot]] = [None] * cap
+        self.seq = array("q", bytes(8 * cap))
+        self.codes = {k: array("I", bytes(4 * cap)) for k in self.CODED}
+        self.tables = {k: StringTable() for k in self.CODED}
+        self._pos = self._n = 0  # prochaine case écrite, nombre de spots
+        for s in reversed(list(items)):
+            self.appendleft(s)
+
+    @staticmethod
+    def _keys(s) -> Tuple[str, ...]:
+        # mêmes comparaisons que filter_spots : mode/continent déjà en majuscules
+        if isinstance(s, Spot):
+            return (s.band or "UNK", s.mode or "UNK", s.get("continent") or "",
+                    s.call.upper(), s.entry.get("country", "").lower())
+        return (s.get("band") or "UNK", s.get("mode") or "UNK", s.get("continent") or "",
+                (s.get("call") or "").upper(), (s.get("dxcc") or "").lower())
+
+    def _write(self, p: int, s):
+        seq = s.get("seq")
+        self.seq[p] = seq if isinstance(seq, int) else 0
+        codes, tables = self.codes, self.tables
+        for k, v in zip(self.CODED, self._keys(s)):
+            codes[k][p] = tables[k].add(v)
+
+    def _release(self, p: int):
+        for k in self.CODED:
+            self.tables[k].release(self.codes[k][p])
+
+    def appendleft(self, s):
+        p = self._pos
+        if self.rows[p] is not None:
+            self._release(p)  # écrase le plus ancien
+        self.rows[p] = s
+        self._write(p, s)
+        self._pos = (p + 1) % self.maxlen
+        if self._n < self.maxlen: self._n += 1
+
+    def rebuild(self):
+        """Relit les colonnes depuis les spots (après renumérotation au chargement)."""
+        for a, b in self._segments():
+            for p in range(a, b):
+                self._release(p)
+                self._write(p, self.rows[p])
+
+    def _segments(self) -> List[Tuple[int, int]]:
+        """Tranches physiques [a, b) dans l'ordre chronologique (plus ancien d'abord)."""
+        start = self._pos - self._n
+        if start >= 0: return [(start, self._pos)]
+        return [(start + self.maxlen, self.maxlen), (0, self._pos)]
+
+    def __len__(self):
+        return self._n
+
+    def __getitem__(self, i: int):
+        if i < 0: i += self._n
+        if not 0 <= i < self._n: raise IndexError("spot index out of range")
+        return self.rows[(self._pos - 1 - i) % self.maxlen]
+
+    def _chrono(self) -> List:
+        out = []
+        for a, b in self._segments():
+            out += self.rows[a:b]
+        return out
+
+    def __iter__(self):
+        L = self._chrono()
+        L.reverse()
+        return iter(L)
+
+    def __reversed__(self):
+        return iter(self._chrono())
+
+    def _wanted(self, f: Dict[str, str]) -> Optional[List[Tuple[str, set]]]:
+        """Filtres -> (colonne, ids acceptés) ; None si un filtre ne peut rien retenir."""
+        out = []
+        for k in self.CODED:
+            v = f.get(k)
+            if not v: continue
+            t = self.tables[k]
+            ids = t.matching(v) if k == "call" else ({t.ids[v]} if v in t.ids else set())
+            if not ids: return None
+            out.append((k, ids))
+        return out
+
+    def _selector(self, wanted: List[Tuple[str, set]], a: int, b: int) -> Optional[bytes]:
+        sel = None
+        for k, ids in wanted:
+            m = map(ids.__contains__, self.codes[k][a:b])
+            sel = m if sel is None else map(and_, sel, m)
+        return None if sel is None else bytes(sel)
+
+    def select(self, f: Dict[str, str], since: Optional[int] = None) -> List:
+        """Spots filtrés (clés de FILTER_KEYS), seq > since, du plus récent au plus ancien."""
+        wanted = self._wanted(f)
+        if wanted is None: return []
+        out = []
+        for a, b in self._segments():
+            if since is not None:
+                a = bisect_right(self.seq, since, a, b)
+            if a >= b: continue
+            sel = self._selector(wanted, a, b)
+            out += self.rows[a:b] if sel is None else compress(self.rows[a:b], sel)
+        out.reverse()
+        return out
+
+    def count(self, f: Dict[str, str], keys=("band", "mode")) -> Dict[str, Counter]:
+        """Comptage par valeur des colonnes `keys` sur les spots filtrés."""
+        counts = {k: Counter() for k in keys}
+        wanted = self._wanted(f)
+        if wanted is None: return {k: {} for k in keys}
+        for a, b in self._segments():
+            sel = self._selector(wanted, a, b)
+            for k in keys:
+                col = self.codes[k][a:b]
+                counts[k].update(col if sel is None else compress(col, sel))
+        return {k: {self.tables[k].strings[i]: n for i, n in c.items()} for k, c in counts.items()}
+
+# =========================
+# Journal de spots (JSON Lines, append-only)
+# =========================
+class SpotJournal:
+    """
+    Un spot = une ligne JSON ajoutée en fin de fichier (coût O(1) par spot).
+    Une mise à jour (dédoublonnage : nspotters) ajoute le spot entier une
+    nouvelle fois : à la relecture, la dernière ligne d'une même seq gagne.
+    Le compactage réécrit le fichier avec les `keep` dernières lignes dès
+    qu'il dépasse 2 × keep lignes ; tail() relit la fin sans tout parser.
+    """
+    BLOCK = 64 * 1024
+
+    def __init__(self, path: str, keep: int):
+        self.path = path
+        self.keep = max(1, keep)
+        self._lock = threading.Lock()
+        self.lines = self._count_lines()
+        self._fh = open(self.path, "a", encoding="utf-8")
+
+    def _count_lines(self) -> int:
+        if not os.path.exists(self.path): return 0
+        n = 0
+        with open(self.path, "rb") as f:
+            for chunk in iter(lambda: f.read(self.BLOCK), b""):
+                n += chunk.count(b"\n")
+        return n
+
+    def append(self, spot: Dict):
+        line = json.dumps(spot_json(spot), ensure_ascii=False) + "\n"
+        with self._lock:
+            self._fh.write(line)
+            self.lines += 1
+
+    def flush(self):
+        with self._lock:
+            self._fh.flush()
+
+    @property
+    def needs_compaction(self) -> bool:
+        return self.lines > 2 * self.keep
+
+    def _tail_raw(self, n: int) -> List[bytes]:
+        if n <= 0 or not os.path.exists(self.path): return []
+        with open(self.path, "rb") as f:
+            f.seek(0, os.SEEK_END)
+            pos = f.tell()
+            buf = b""
+            while pos > 0 and buf.count(b"\n") <= n:
+                step = min(self.BLOCK, pos)
+                pos -= step
+                f.seek(pos)
+                buf = f.read(step) + buf
+        return [l for l in buf.split(b"\n") if l.strip()][-n:]
+
+    def tail(self, n: int) -> List[Dict]:
+        """Les spots des n dernières lignes, du plus ancien au plus récent (mises à jour appliquées)."""
+        with self._lock:
+            self._fh.flush()
+            raw = self._tail_raw(n)
+        out, by_seq = [], {}
+        for l in raw:
+            try:
+                d = json.loads(l)
+            except ValueError:
+                continue  # ligne tronquée (arrêt brutal)
+            if not isinstance(d, dict): continue
+            i = by_seq.get(d.get("seq")) if d.get("seq") else None
+            if i is not None:
+                out[i] = d  # mise à jour : garde la place d'origine
+                continue
+            if d.get("seq"): by_seq[d["seq"]] = len(out)
+            out.append(d)
+        return out
+
+    def compact(self):
+        with self._lock:
+            self._fh.flush()
+            raw = self._tail_raw(self.keep)
+            tmp = self.path + ".tmp"
+            with open(tmp, "wb") as f:
+                for l in raw:
+                    f.write(l + b"\n")
+            self._fh.close()
+            os.replace(tmp, self.path)
+            self._fh = open(self.path, "a", encoding="utf-8")
+            self.lines = len(raw)
+        logger.info(f"[SPOTS] Journal compacté ({self.lines} lignes)")
+
+    def close(self):
+        with self._lock:
+            try: self._fh.close()
+            except Exception: pass
+
+# =========================
+# Découpage en lignes du flux cluster
+# =========================
+class LineFramer:
+    """
+    Tampon d'octets : les newlines sont cherchées en une passe sur le bloc
+    reçu, seules les lignes complètes sont décodées (un caractère UTF-8 coupé
+    entre deux recv() n'est plus perdu). Octets invalides ignorés comme avant.
+    """
+    MAX_PENDING = 64 * 1024  # ligne sans fin au-delà : jetée
+
+    def __init__(self):
+        self.buf = bytearray()
+
+    def feed(self, data: bytes) -> List[str]:
+        buf = self.buf
+        start = len(buf)
+        buf += data
+        end = buf.rfind(b"\n", start)
+        if end < 0:
+            if len(buf) > self.MAX_PENDING: buf.clear()
+            return []
+        chunk = buf[:end].decode("utf-8", errors="ignore")
+        del buf[:end + 1]
+        out = []
+        for line in chunk.split("\n"):
+            line = line.strip("\r ").strip()
+            if line: out.append(line)
+        return out
+
+# =========================
+# Multi-cluster (asyncio)
+# =========================
+class ClusterFeed:
+    """Un cluster telnet : adresse, login et état (connexion, compteurs)."""
+    def __init__(self, host: str, port: int, login: str = CLUSTER_CALLSIGN):
+        self.host, self.port, self.login = host, port, login
+        self.connected = False
+        self.lines = self.spots = self.reconnects = 0
+
+    @property
+    def name(self) -> str:
+        return f"{self.host}:{self.port}"
+
+    def status(self) -> Dict:
+        return {"host": self.host, "port": self.port, "connected": self.connected,
+                "lines": self.lines, "spots": self.spots, "reconnects": self.reconnects}
+
+def parse_clusters(spec: str) -> List[ClusterFeed]:
+    feeds = []
+    for item in (spec or "").split(","):
+        parts = item.strip().split(":")
+        if not parts[0]: continue
+        try:
+            port = int(parts[1]) if len(parts) > 1 and parts[1] else 8000
+        except ValueError:
+            logger.warning(f"[CLUSTER] Entrée CLUSTERS invalide : {item}")
+            continue
+        login = parts[2] if len(parts) > 2 and parts[2] else CLUSTER_CALLSIGN
+        feeds.append(ClusterFeed(parts[0], port, login))
+    return feeds
+
+# =========================
+# Dé-duplication des spots
+# =========================
+class DedupEntry:
+    __slots__ = ("ts", "freq", "spot", "spotters")
+    def __init__(self, ts: float, freq: float, spot: Dict):
+        self.ts, self.freq, self.spot = ts, freq, spot
+        self.spotters = {spot.get("spotter", "")}
+
+class SpotDeduper:
+    """
+    Même indicatif, fréquence à ±tol kHz, vu il y a moins de `window` s :
+    c'est le même spot (autre spotter ou autre cluster). Index de hachage
+    (indicatif, case de fréquence) ; les clés expirent dans l'ordre d'arrivée.
+    """
+    def __init__(self, window: float = DEDUP_WINDOW, tol: float = DEDUP_FREQ_TOL):
+        self.window, self.tol = window, max(tol, 0.001)
+        self._index: Dict[Tuple[str, int], List[DedupEntry]] = {}
+        self._order: deque = deque()  # (clé, entrée) par ordre d'arrivée
+        self.merged = 0
+
+    def _expire(self, now: float):
+        limit = now - self.window
+        while self._order and self._order[0][1].ts < limit:
+            key, e = self._order.popleft()
+            L = self._index.get(key)
+            if L is None: continue
+            try: L.remove(e)
+            except ValueError: pass
+            if not L: del self._index[key]
+
+    def check(self, spot: Dict, now: Optional[float] = None) -> Optional[Dict]:
+        """Spot déjà vu -> renvoie le spot existant (nspotters mis à jour), sinon None."""
+        now = time.time() if now is None else now
+        self._expire(now)
+        try:
+            freq = float(spot.get("freq") or 0)
+        except (TypeError, ValueError):
+            freq = 0.0
+        call = (spot.get("call") or "").upper()
+        b = int(freq // self.tol)
+        for k in (b, b - 1, b + 1):
+            for e in self._index.get((call, k), ()):
+                if abs(e.freq - freq) <= self.tol:
+                    e.spotters.add(spot.get("spotter", ""))
+                    e.spot["nspotters"] = len(e.spotters)
+                    self.merged += 1
+                    return e.spot
+        e = DedupEntry(now, freq, spot)
+        spot["nspotters"] = 1
+        self._index.setdefault((call, b), []).append(e)
+        self._order.append(((call, b), e))
+        return None
+
+    def __len__(self):
+        return len(self._order)
+
+# =========================
+# Statistiques incrémentales
+# =========================
+def _parse_window(v: Optional[str]) -> Optional[int]:
+    """'90' (s), '15m', '2h', '1d' -> secondes ; None si vide/invalide."""
+    if not v: return None
+    v = v.strip().lower()
+    mult = {"s": 1, "m": 60, "h": 3600, "d": 86400}.get(v[-1:])
+    try:
+        n = float(v[:-1]) if mult else float(v)
+    except ValueError:
+        return None
+    secs = int(n * (mult or 1))
+    return secs if secs > 0 else None
+
+class RollupBucket:
+    __slots__ = ("total", "bands", "modes", "continents", "gen")
+    def __init__(self, gen: int = 0):
+        self.total = 0
+        self.bands, self.modes, self.continents = Counter(), Counter(), Counter()
+        self.gen = gen  # génération de SpotStats à la création : plus ancienne = peut-être publiée
+
+    def copy(self, gen: int) -> "RollupBucket":
+        b = RollupBucket(gen)
+        b.total = self.total
+        b.bands, b.modes, b.continents = Counter(self.bands), Counter(self.modes), Counter(self.continents)
+        return b
+
+    def add(self, band: str, mode: str, cont: str):
+        self.total += 1
+        self.bands[band] += 1; self.modes[mode] += 1; self.continents[cont] += 1
+
+class SpotStats:
+    """
+    Compteurs bande/mode/continent de la fenêtre en mémoire, mis à jour en O(1)
+    à l'ajout et à l'éviction, plus des cumuls par minute et par heure (tous
+    les spots reçus, non décrémentés) pour ?window=. À appeler sous self.lock.
+    freeze() publie les cumuls (tuples de buckets) : un bucket déjà publié
+    n'est plus modifié, l'ajout suivant travaille sur une copie.
+    """
+    def __init__(self, minutes: int = STATS_MINUTES, hours: int = STATS_HOURS):
+        self.bands, self.modes, self.continents = Counter(), Counter(), Counter()
+        self.minutes: "OrderedDict[int, RollupBucket]" = OrderedDict()
+        self.hours: "OrderedDict[int, RollupBucket]" = OrderedDict()
+        self.keep_minutes, self.keep_hours = minutes, hours
+        self.gen = 0
+
+    @staticmethod
+    def _keys(s: Dict) -> Tuple[str, str, str]:
+        return s.get("band","UNK"), s.get("mode","UNK"), s.get("continent") or "??"
+
+    def add(self, s: Dict, ts: Optional[float] = None):
+        band, mode, cont = self._keys(s)
+        self.bands[band] += 1; self.modes[mode] += 1; self.continents[cont] += 1
+        ts = time.time() if ts is None else ts
+        for buckets, size, keep in ((self.minutes, 60, self.keep_minutes), (self.hours, 3600, self.keep_hours)):
+            k = int(ts // size)
+            newest = next(reversed(buckets)) if buckets else k
+            if k <= newest - keep: continue  # trop ancien pour être conservé
+            b = buckets.get(k)
+            if b is None:
+                b = buckets[k] = RollupBucket(self.gen)
+                if k < newest:  # spots rejoués au démarrage dans le désordre
+                    items = sorted(buckets.items())
+                    buckets.clear(); buckets.update(items)
+                newest = max(newest, k)
+                while next(iter(buckets)) <= newest - keep:
+                    buckets.popitem(last=False)
+            elif b.gen != self.gen:
+                b = buckets[k] = b.copy(self.gen)  # copie sur écriture : la vue garde l'ancien
+            b.add(band, mode, cont)
+
+    def remove(self, s: Dict):
+        band, mode, cont = self._keys(s)
+        for c, k in ((self.bands, band), (self.modes, mode), (self.continents, cont)):
+            c[k] -= 1
+            if c[k] <= 0: del c[k]
+
+    def clear(self):
+        self.__init__(self.keep_minutes, self.keep_hours)
+
+    def current(self) -> Dict:
+        return {"bands": dict(self.bands), "modes": dict(self.modes), "continents": dict(self.continents)}
+
+    def freeze(self) -> Tuple[Tuple, Tuple]:
+        """Cumuls (minute, heure) figés pour SpotView ; lisibles ensuite sans verrou."""
+        self.gen += 1
+        return tuple(self.minutes.items()), tuple(self.hours.items())
+
+    def window(self, secs: int, now: Optional[float] = None, rollups: Optional[Tuple[Tuple, Tuple]] = None) -> Dict:
+        """Somme des cumuls couvrant les `secs` dernières secondes (minute ou heure) ; `rollups` : freeze()."""
+        now = time.time() if now is None else now
+        minutes, hours = rollups if rollups is not None else (self.minutes.items(), self.hours.items())
+        if secs <= self.keep_minutes * 60:
+            buckets, size = minutes, 60
+        else:
+            buckets, size = hours, 3600
+        first = int((now - secs) // size)  # bucket partiel inclus
+        out = RollupBucket()
+        for k, b in reversed(buckets):
+            if k < first: break
+            out.total += b.total
+            out.bands.update(b.bands); out.modes.update(b.modes); out.continents.update(b.continents)
+        return {"window": secs, "resolution": "minute" if size == 60 else "hour", "total": out.total,
+                "bands": dict(out.bands), "modes": dict(out.modes), "continents": dict(out.continents)}
+
+# =========================
+# Cache de réponses pré-encodées
+# =========================
+class Snapshot:
+    __slots__ = ("version", "body", "gz", "br")
+    def __init__(self, version, body: bytes, gz: Optional[bytes], br: Optional[bytes] = None):
+        self.version, self.body, self.gz, self.br = version, body, gz, br
+
+class ViewChunk:
+    """
+    Bloc immuable de la fenêtre publiée : spots (plus récent d'abord), -seq
+    (croissant, pour ?since= par bisection) et colonnes de filtrage (mêmes
+    clés que SpotColumns), parcourues en C par map / compress / Counter.
+    """
+    __slots__ = ("rows", "negseq", "cols")
+    def __init__(self, rows: Tuple, negseq: array, cols: Dict[str, Tuple]):
+        self.rows, self.negseq, self.cols = rows, negseq, cols
+
+    @classmethod
+    def of(cls, spots) -> "ViewChunk":
+        rows = tuple(spots)
+        cols = zip(*map(SpotColumns._keys, rows)) if rows else repeat((), len(SpotColumns.CODED))
+        return cls(rows, array("q", [-(s.get("seq") or 0) for s in rows]), dict(zip(SpotColumns.CODED, cols)))
+
+    def __len__(self):
+        return len(self.rows)
+
+    def __add__(self, older: "ViewChunk") -> "ViewChunk":
+        return ViewChunk(self.rows + older.rows, self.negseq + older.negseq,
+                         {k: c + older.cols[k] for k, c in self.cols.items()})
+
+    def head(self, n: int) -> "ViewChunk":
+        return ViewChunk(self.rows[:n], self.negseq[:n], {k: c[:n] for k, c in self.cols.items()})
+
+class FrozenWindow:
+    """
+    Fenêtre publiée, persistante : une liste de ViewChunk (plus récent d'abord)
+    dont les tailles croissent vers le passé. Publier = ajouter un bloc en
+    tête, fusionner tant que le bloc de tête est au moins aussi grand que le
+    suivant (O(log n) blocs, chaque spot recopié O(log n) fois en tout), et
+    évincer en tronquant logiquement le dernier bloc (recopié seulement quand
+    moins de la moitié reste utile). Le coût d'une publication ne dépend donc
+    pas de MAX_SPOTS. Même interface de lecture que la fenêtre : itération du
+    plus récent au plus ancien, len, [i], plus select / count comme SpotColumns.
+    """
+    __slots__ = ("chunks", "n")
+    def __init__(self, chunks: Tuple[ViewChunk, ...] = (), n: int = 0):
+        self.chunks, self.n = chunks, n
+
+    def extend(self, spots: List, maxlen: Optional[int]) -> "FrozenWindow":
+        """Nouvelle fenêtre avec `spots` (plus récent d'abord) en tête, bornée à maxlen."""
+        chunks, n = list(self.chunks), self.n
+        if spots:
+            chunks.insert(0, ViewChunk.of(spots))
+            n += len(spots)
+        while len(chunks) > 1 and len(chunks[0]) >= len(chunks[1]):
+            older = chunks[1]
+            if len(chunks) == 2:  # dernier bloc : partie encore dans la fenêtre
+                older = older.head(n - len(chunks[0]))
+            chunks[0:2] = [chunks[0] + older]
+        if maxlen is not None and n > maxlen:
+            n = maxlen
+            before = sum(map(len, chunks)) - len(chunks[-1])
+            while before >= n:
+                chunks.pop()
+                before -= len(chunks[-1])
+            last = n - before
+            if 2 * last < len(chunks[-1]):
+                chunks[-1] = chunks[-1].head(last)
+        return FrozenWindow(tuple(chunks), n)
+
+    def _parts(self):
+        """(bloc, nombre de spots valides) du plus récent au plus ancien."""
+        left = self.n
+        for c in self.chunks:
+            m = min(len(c), left)
+            yield c, m
+            left -= m
+
+    def __len__(self):
+        return self.n
+
+    def __iter__(self):
+        return chain.from_iterable(islice(c.rows, m) for c, m in self._parts())
+
+    def __getitem__(self, i: int):
+        if i < 0: i += self.n
+        if not 0 <= i < self.n: raise IndexError("spot index out of range")
+        for c, m in self._parts():
+            if i < m: return c.rows[i]
+            i -= m
+
+    @staticmethod
+    def _selector(c: ViewChunk, f: Dict[str, str]):
+        sel = None
+        for k in SpotColumns.CODED:
+            v = f.get(k)
+            if not v: continue
+            m = map(str.startswith, c.cols[k], repeat(v)) if k == "call" else map(v.__eq__, c.cols[k])
+            sel = m if sel is None else map(and_, sel, m)
+        return sel
+
+    def select(self, f: Dict[str, str], since: Optional[int] = None) -> List:
+        """Spots filtrés (clés de FILTER_KEYS, normalisées par _filter_args), seq > since."""
+        out = []
+        for c, m in self._parts():
+            k = m if since is None else bisect_left(c.negseq, -since, 0, m)
+            sel = self._selector(c, f)
+            out += islice(c.rows, k) if sel is None else compress(islice(c.rows, k), sel)
+            if k < m: break  # seq décroissantes : les blocs suivants sont plus anciens
+        return out
+
+    def count(self, f: Dict[str, str], keys=("band", "mode")) -> Dict[str, Dict[str, int]]:
+        """Comptage par valeur des colonnes `keys` sur les spots filtrés."""
+        counts = {k: Counter() for k in keys}
+        for c, m in self._parts():
+            sel = self._selector(c, f)
+            sel = None if sel is None else bytes(islice(sel, m))  # partagé par les colonnes comptées
+            for k in keys:
+                col = islice(c.cols[k], m)
+                counts[k].update(col if sel is None else compress(col, sel))
+        return {k: dict(c) for k, c in counts.items()}
+
+class SpotView:
+    """
+    Fenêtre figée, publiée par l'ingestion après chaque bloc reçu : une
+    FrozenWindow (persistante : les blocs déjà publiés sont partagés) et ce
+    qui va avec, remplacés d'un coup par une seule affectation de self.view.
+    Les lecteurs (routes, filtres, comptages, save_spots) la lisent sans
+    verrou et n'empêchent jamais l'ingestion d'avancer ; version et seq
+    décrivent exactement son contenu. Seul nspotters d'un Spot déjà publié
+    change encore (dédoublonnage : entier, lu tel quel).
+    """
+    __slots__ = ("version", "seq", "mtime", "spots", "stats", "rollups", "marked")
+    def __init__(self, version: int = 0, seq: int = 0, mtime: float = 0.0, spots: Optional[FrozenWindow] = None,
+                 stats: Optional[Dict] = None, rollups: Tuple[Tuple, Tuple] = ((), ()), marked: int = 0):
+        self.version, self.seq, self.mtime = version, seq, mtime
+        self.spots = spots if spots is not None else FrozenWindow()
+        self.stats = stats if stats is not None else {"bands": {}, "modes": {}, "continents": {}}
+        self.rollups = rollups  # SpotStats.freeze() : pour /stats.json?window=
+        self.marked = marked  # spots marqués « à écrire » au moment de la publication
+
+class SnapshotCache:
+    """
+    Réponses JSON pré-encodées (et pré-gzippées) par clé et par version
+    (entier croissant : seq des spots, rss_version).
+    `build()` renvoie (version, données) : il copie l'état sous self.lock,
+    l'encodage se fait ensuite hors verrou, au plus une fois par version
+    (verrou par clé : les lecteurs concurrents attendent le même encodage).
+    """
+    def __init__(self, use_gzip: bool = SNAPSHOT_GZIP):
+        self.use_gzip = use_gzip
+        self._entries: Dict[str, Snapshot] = {}
+        self._locks: Dict[str, threading.Lock] = defaultdict(threading.Lock)
+        self.builds = 0
+
+    def get(self, key: str, version, build) -> Snapshot:
+        e = self._entries.get(key)
+        if e is not None and e.version >= version:
+            return e
+        with self._locks[key]:
+            e = self._entries.get(key)
+            if e is not None and e.version >= version:
+                return e
+            v, data = build()
+            body = json_bytes(data)
+            gz = br = None
+            if self.use_gzip and len(body) >= GZIP_MIN_SIZE:
+                gz = compress_body(body, "gzip")
+                if brotli is not None: br = compress_body(body, "br")
+            e = self._entries[key] = Snapshot(v, body, gz, br)
+            self.builds += 1
+            return e
+
+# =========================
+# Diffusion SSE (/stream)
+# =========================
+class SSESubscriber:
+    __slots__ = ("q", "dropped")
+    def __init__(self, maxsize: int):
+        self.q: "queue.Queue[Tuple[str, str]]" = queue.Queue(maxsize=maxsize)
+        self.dropped = False
+
+class SpotBroadcaster:
+    """
+    Publie les événements (spot, status, alert) vers chaque client /stream via une
+    file bornée par client. Un client trop lent (file pleine) est décroché :
+    son flux se termine et EventSource se reconnecte puis resynchronise.
+    """
+    def __init__(self, maxsize: int = SSE_QUEUE_SIZE):
+        self.maxsize = maxsize
+        self._subs: List[SSESubscriber] = []
+        self._lock = threading.Lock()
+        self.dropped_total = 0
+
+    def subscribe(self) -> SSESubscriber:
+        sub = SSESubscriber(self.maxsize)
+        with self._lock:
+            self._subs.append(sub)
+        return sub
+
+    def unsubscribe(self, sub: SSESubscriber):
+        with self._lock:
+            if sub in self._subs: self._subs.remove(sub)
+
+    def __len__(self):
+        return len(self._subs)
+
+    def subscribers(self) -> List[SSESubscriber]:
+        with self._lock:
+            return list(self._subs)
+
+    def publish(self, event: str, data):
+        """data : dict, ou Spot converti seulement s'il y a des clients."""
+        if not self._subs: return
+        payload = json.dumps(spot_json(data), ensure_ascii=False)
+        for sub in self.subscribers():
+            self._put(sub, event, payload)
+
+    def send(self, sub: SSESubscriber, event: str, data: Dict):
+        """Événement pour un seul client."""
+        self._put(sub, event, json.dumps(data, ensure_ascii=False))
+
+    def _put(self, sub: SSESubscriber, event: str, payload: str):
+        try:
+            sub.q.put_nowait((event, payload))
+        except queue.Full:
+            sub.dropped = True
+            self.unsubscribe(sub)
+            self.dropped_total += 1
+            logger.info("[SSE] Client trop lent, décroché")
+
+    def stream(self, sub: SSESubscriber, stop_event: threading.Event):
+        try:
+            yield "retry: 3000\n\n"
+            while not stop_event.is_set() and not sub.dropped:
+                try:
+                    event, payload = sub.q.get(timeout=SSE_KEEPALIVE)
+                except queue.Empty:
+                    yield ": keep-alive\n\n"
+                    continue
+                yield f"event: {event}\ndata: {payload}\n\n"
+        finally:
+            self.unsubscribe(sub)
+
+# =========================
+# Watchlist côté serveur (alertes)
+# =========================
+WATCH_PATTERN_RE = re.compile(r"^[A-Z0-9/*?]{1,16}$")
+
+class WatchlistMatcher:
+    """
+    Tous les motifs compilés en un seul objet, testé une fois par spot :
+      exact  : F5AA (touche aussi F5AA/P, F5AA/QRP)
+      préfixe: 3Y0*, VK0/  -> dict par longueur, comme l'index DXCC
+      joker  : */MM, K?ABC -> regex rangées par partie fixe de tête ("", "K"),
+               seules celles dont la tête correspond à l'indicatif sont testées
+    match() renvoie les motifs touchés.
+    """
+    def __init__(self, patterns):
+        self.exact: Dict[str, List[str]] = defaultdict(list)
+        self.prefixes: Dict[str, List[str]] = defaultdict(list)
+        self.globs: Dict[str, List[Tuple[str, "re.Pattern"]]] = defaultdict(list)
+        for p in patterns:
+            if "?" in p or "*" in p[:-1]:
+                head = re.split(r"[*?]", p, 1)[0]
+                self.globs[head].append((p, re.compile(fnmatch.translate(p))))
+            elif p.endswith("*"):
+                self.prefixes[p[:-1]].append(p)
+            elif p.endswith("/"):
+                self.prefixes[p].append(p)
+            else:
+                self.exact[p].append(p)
+        self.prefix_lengths = sorted({len(k) for k in self.prefixes}, reverse=True)
+        self.glob_lengths = sorted({len(k) for k in self.globs}, reverse=True)
+
+    def __bool__(self):
+        return bool(self.exact or self.prefixes or self.globs)
+
+    def match(self, call: str) -> List[str]:
+        call = call.upper()
+        hits = list(self.exact.get(call, ()))
+        head, _, tail = call.rpartition("/")
+        if head and len(tail) <= 3:  # suffixe portable /P /M /MM /QRP
+            hits += self.exact.get(head, ())
+        n_call = len(call)
+        for n in self.prefix_lengths:
+            if n <= n_call:
+                hits += self.prefixes.get(call[:n], ())
+        for n in self.glob_lengths:
+            if n <= n_call:
+                hits += [p for p, r in self.globs.get(call[:n], ()) if r.match(call)]
+        return hits
+
+class WatchlistEngine:
+    """
+    Motifs de watchlist.json (rechargé à chaud) et motifs propres à chaque
+    client /stream (?watch=), réunis dans un seul WatchlistMatcher : le coût
+    par spot ne dépend pas du nombre de clients. Les alertes passent par le
+    même SpotBroadcaster que les spots (événement « alert », une seule
+    connexion par onglet) : vers tous les clients pour les motifs du fichier
+    (gardée aussi pour /alerts.json), vers le seul client concerné pour ses
+    propres motifs.
+    """
+    def __init__(self, path: str, broadcaster: SpotBroadcaster, keep: int = ALERTS_KEEP):
+        self.path, self.broadcaster = path, broadcaster
+        self.file_patterns: List[str] = []
+        self.clients: Dict[SSESubscriber, List[str]] = {}
+        self.recent: deque = deque(maxlen=keep)
+        self.alert_id = 0
+        self.mtime: Optional[float] = None
+        self._checked = 0.0
+        self._lock = threading.Lock()
+        self.owners: Dict[str, set] = {}
+        self.matcher = WatchlistMatcher(())
+        self.reload()
+
+    @staticmethod
+    def normalize(items) -> List[str]:
+        out = []
+        for it in items or ():
+            if isinstance(it, dict): it = it.get("call") or it.get("pattern")
+            p = str(it or "").strip().upper()
+            if WATCH_PATTERN_RE.match(p) and p not in out: out.append(p)
+        return out
+
+    def reload(self) -> bool:
+        """Relit le fichier s'il a changé (mtime) ; fichier absent = aucun motif."""
+        try:
+            mtime = os.path.getmtime(self.path)
+        except OSError:
+            mtime = None
+        if mtime == self.mtime: return False
+        patterns = []
+        if mtime is not None:
+            try:
+                with open(self.path, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+                patterns = self.normalize(data if isinstance(data, list) else data.get("watchlist"))
+            except (OSError, ValueError, AttributeError) as e:
+                logger.warning(f"[WATCH] {self.path} invalide : {e}")
+                self.mtime = mtime
+                return False
+        with self._lock:
+            self.mtime, self.file_patterns = mtime, patterns
+            self._compile()
+        logger.info(f"[WATCH] {len(patterns)} motifs chargés depuis {self.path}")
+        return True
+
+    def _compile(self):
+        # sous self._lock ; motif -> destinataires (None = tous les clients)
+        owners = defaultdict(set)
+        for p in self.file_patterns: owners[p].add(None)
+        for sub, pats in self.clients.items():
+            for p in pats: owners[p].add(sub)
+        self.owners, self.matcher = dict(owners), WatchlistMatcher(owners)
+
+    def subscribe(self, patterns: List[str]) -> SSESubscriber:
+        sub = self.broadcaster.subscribe()
+        if patterns:
+            with self._lock:
+                self.clients[sub] = patterns
+                self._compile()
+        return sub
+
+    def unsubscribe(self, sub: SSESubscriber):
+        self.broadcaster.unsubscribe(sub)
+        with self._lock:
+            if self.clients.pop(sub, None) is not None:
+                self._compile()
+
+    def stream(self, sub: SSESubscriber, stop_event: threading.Event):
+        try:
+            yield from self.broadcaster.stream(sub, stop_event)
+        finally:
+            self.unsubscribe(sub)
+
+    def check(self, spot) -> Optional[Dict]:
+        """Appelé une fois par nouveau spot ; renvoie l'alerte publique éventuelle."""
+        now = time.time()
+        if now - self._checked >= WATCHLIST_RELOAD:
+            self._checked = now
+            self.reload()
+        matcher, owners = self.matcher, self.owners
+        if not matcher: return None
+        hits = matcher.match(spot.get("call") or "")
+        if not hits: return None
+        public, own = [], defaultdict(list)
+        for p in dict.fromkeys(hits):
+            for dest in owners.get(p, ()):
+                if dest is None: public.append(p)
+                else: own[dest].append(p)
+        with self._lock:
+            self.alert_id += 1
+            base = {"id": self.alert_id, "ts": now, "spot": spot_json(spot)}
+            alert = dict(base, patterns=public) if public else None
+            if alert: self.recent.appendleft(alert)
+        for sub in self.broadcaster.subscribers():
+            pats = public + [p for p in own.get(sub, ()) if p not in public]
+            if pats:
+                self.broadcaster.send(sub, "alert", dict(base, patterns=pats))
+        return alert
+
+    def snapshot(self, since: Optional[int] = None) -> Dict:
+        with self._lock:
+            alerts = [a for a in self.recent if since is None or a["id"] > since]
+            return {"alerts": alerts, "last_id": self.alert_id, "patterns": list(self.file_patterns)}
+
+# =========================
+# Most wanted (data/mostwanted.json)
+# =========================
+DEFAULT_MOST_WANTED = [  # si le fichier est absent ou invalide
+    # prefix (facultatif) : clé(s) de la table DXCC quand le nom de l'entité y est écrit autrement
+    {"name": "Bouvet Island",           "flag": "🇧🇻"},
+    {"name": "South Sandwich Islands",  "flag": "🇬🇸"},
+    {"name": "Amsterdam & St Paul",     "flag": "🇫🇷", "prefix": "FT5Z"},
+    {"name": "Baker & Howland Islands", "flag": "🇺🇸", "prefix": "KH1"},
+    {"name": "North Korea",             "flag": "🇰🇵", "prefix": "P5"},
+    {"name": "Clipperton Island",       "flag": "🇫🇷"},
+    {"name": "Heard Island",            "flag": "🇦🇺", "prefix": "VK0H"}
+]
+
+_ENTITY_NOISE = {"island", "islands", "is", "and", "the", "of"}
+
+def _entity_key(name: str) -> str:
+    """Nom d'entité comparable : « Heard & McDonald » = « Heard & McDonald Islands »."""
+    n = (name or "").lower().replace("&", " and ").replace("st.", "saint ")
+    return " ".join("saint" if w == "st" else w for w in re.findall(r"[a-z0-9]+", n) if w not in _ENTITY_NOISE)
+
+class MostWanted:
+    """
+    Liste classée des entités recherchées (fichier JSON rechargé à chaud),
+    résolue une fois en entités DXCC (noms de pays de dxcc_map) : marquer un
+    spot = une recherche de son champ dxcc (l'entité trouvée par dxcc_lookup)
+    dans un dict, jamais un test sur l'indicatif, donc drapeau et pays du spot
+    sont toujours d'accord. Résolution par le nom, sinon par le champ
+    « prefix » (clé exacte de dxcc_map). Une entité que la table ne connaît
+    pas n'est jamais marquée : elle est listée dans /wanted.json (« unresolved »).
+    Les spots « wanted » récents sont gardés pour /wanted/hits.json (ajout en O(1)).
+    """
+    def __init__(self, path: str, keep: int = WANTED_HITS_KEEP):
+        self.path = path
+        self.entries: List[Dict] = []
+        self.keys: Dict[str, int] = {}  # pays dxcc_map -> rang (1 = le plus recherché)
+        self.unresolved: List[str] = []
+        self.table: Dict[str, str] = {}  # préfixe dxcc_map -> pays
+        self.hits: deque = deque(maxlen=keep)
+        self.hit_id = 0
+        self.mtime: Optional[float] = None
+        self._checked = 0.0
+        self._lock = threading.Lock()
+        self.reload()
+
+    def reload(self) -> bool:
+        try:
+            mtime = os.path.getmtime(self.path)
+        except OSError:
+            mtime = None
+        if mtime == self.mtime and self.entries: return False
+        data = None
+        if mtime is not None:
+            try:
+                with open(self.path, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+            except (OSError, ValueError) as e:
+                logger.warning(f"[WANTED] {self.path} invalide : {e}")
+        if not isinstance(data, list):
+            data = DEFAULT_MOST_WANTED
+        entries = []
+        for it in data:
+            if not isinstance(it, dict): continue
+            name = it.get("dxcc") or it.get("name")
+            if not name: continue
+            e = {"name": name, "flag": it.get("flag", ""), "rank": len(entries) + 1}
+            prefix = it.get("prefix")
+            if isinstance(prefix, str): prefix = [prefix]
+            if prefix: e["prefix"] = [p.strip().upper() for p in prefix if isinstance(p, str) and p.strip()]
+            entries.append(e)
+        with self._lock:
+            self.mtime, self.entries = mtime, entries
+            self._resolve()
+        logger.info(f"[WANTED] {len(entries)} entités chargées ({self.path if mtime else 'liste par défaut'})")
+        return True
+
+    def maybe_reload(self):
+        now = time.time()
+        if now - self._checked >= WATCHLIST_RELOAD:
+            self._checked = now
+            self.reload()
+
+    def resolve(self, dxcc_map: Dict[str, Dict]):
+        """Table DXCC (préfixe -> entrée) ; à rappeler quand elle change."""
+        with self._lock:
+            self.table = {p: e.get("country", "") for p, e in dxcc_map.items()}
+            self._resolve()
+
+    def _resolve(self):
+        # sous self._lock
+        by_key = {}
+        for c in sorted(set(self.table.values())):
+            by_key.setdefault(_entity_key(c), c)
+        keys, missing = {}, []
+        for e in self.entries:
+            c = by_key.get(_entity_key(e["name"]))
+            match = "name" if c else None
+            for p in e.get("prefix", ()):
+                if c: break
+                c = self.table.get(p)
+                match = "prefix" if c else None
+            e["dxcc"], e["match"] = c, match
+            if c: keys.setdefault(c, e["rank"])
+            else: missing.append(e["name"])
+        self.keys = keys
+        self.unresolved = missing
+        if missing and self.table:
+            logger.warning(f"[WANTED] Absentes de la table DXCC (ni nom ni préfixe), jamais marquées : {', '.join(missing)}")
+
+    def check(self, spot) -> int:
+        """Marque le spot (rang, 0 si non recherché) ; un spot marqué est ajouté aux hits."""
+        rank = self.keys.get(spot.get("dxcc"), 0)
+        spot["wanted"] = rank
+        if rank: self.record(spot)
+        return rank
+
+    def record(self, spot):
+        e = self.entries[spot["wanted"] - 1] if 0 < spot["wanted"] <= len(self.entries) else {}
+        with self._lock:
+            self.hit_id += 1
+            self.hits.appendleft({"id": self.hit_id, "rank": spot["wanted"], "name": e.get("name", ""),
+                                  "flag": e.get("flag", ""), "spot": spot_json(spot)})
+
+    def payload(self) -> Dict:
+        with self._lock:
+            return {"wanted": [dict(e) for e in self.entries], "unresolved": list(self.unresolved)}
+
+    def hits_snapshot(self, since: Optional[int] = None) -> Tuple[int, Dict]:
+        with self._lock:
+            hits = [h for h in self.hits if since is None or h["id"] > since]
+            return self.hit_id, {"hits": hits, "last_id": self.hit_id}
+
+# =========================
+# Historique SQLite
+# =========================
+def _parse_time_param(v: Optional[str]) -> Optional[float]:
+    """Epoch (secondes) ou ISO 8601 -> epoch ; None si vide/invalide."""
+    if not v: return None
+    try:
+        return float(v)
+    except ValueError:
+        pass
+    try:
+        dt = datetime.fromisoformat(v.replace("Z", "+00:00"))
+        if dt.tzinfo is None: dt = dt.replace(tzinfo=timezone.utc)
+        return dt.timestamp()
+    except ValueError:
+        return None
+
+def _spot_epoch(spot: Dict) -> float:
+    if isinstance(spot, Spot): return spot.ts_us / 1e6
+    try:
+        return datetime.fromisoformat(spot.get("timestamp", "")).timestamp()
+    except (TypeError, ValueError):
+        return time.time()
+
+class SpotHistory:
+    """
+    Historique complet des spots (sqlite3, mode WAL). Les spots sont mis en
+    file par le lecteur cluster et écrits par lots dans une seule transaction
+    par le thread « history ». Lecture : une connexion par thread HTTP.
+    """
+    COLS = ("utc", "freq", "call", "mode", "band", "dxcc", "spotter", "lat", "lon", "comment")
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS spots (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            ts REAL NOT NULL, utc TEXT, freq REAL, call TEXT, mode TEXT, band TEXT,
+            dxcc TEXT, spotter TEXT, lat REAL, lon REAL, comment TEXT
+        );
+        CREATE INDEX IF NOT EXISTS idx_spots_ts   ON spots(ts);
+        CREATE INDEX IF NOT EXISTS idx_spots_call ON spots(call, ts);
+        CREATE INDEX IF NOT EXISTS idx_spots_band ON spots(band, ts);
+        CREATE INDEX IF NOT EXISTS idx_spots_mode ON spots(mode, ts);
+        CREATE INDEX IF NOT EXISTS idx_spots_dxcc ON spots(dxcc, ts);
+    """
+
+    def __init__(self, path: str, batch: int = HISTORY_BATCH):
+        self.path = path
+        self.batch = max(1, batch)
+        self.q: "queue.Queue[Dict]" = queue.Queue()
+        self._local = threading.local()
+        conn = self._connect()
+        conn.executescript(self.SCHEMA)
+        conn.commit()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, timeout=10)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def _conn(self) -> sqlite3.Connection:
+        c = getattr(self._local, "conn", None)
+        if c is None:
+            c = self._local.conn = self._connect()
+        return c
+
+    def add(self, spot: Dict):
+        self.q.put(spot)
+
+    def _row(self, s: Dict) -> Tuple:
+        try: freq = float(s.get("freq") or 0)
+        except (TypeError, ValueError): freq = 0.0
+        return (_spot_epoch(s), s.get("utc", ""), freq, s.get("call", ""), s.get("mode", ""),
+                s.get("band", ""), s.get("dxcc", ""), s.get("spotter", ""),
+                s.get("lat", 0), s.get("lon", 0), s.get("comment", ""))
+
+    def flush(self, block_first: float = 0) -> int:
+        """Vide la file en lots de `batch` ; attend au plus block_first s le 1er spot."""
+        try:
+            first = self.q.get(timeout=block_first) if block_first else self.q.get_nowait()
+        except queue.Empty:
+            return 0
+        rows, total, conn = [self._row(first)], 0, self._conn()
+        while rows:
+            while len(rows) < self.batch:
+                try: rows.append(self._row(self.q.get_nowait()))
+                except queue.Empty: break
+            with conn:
+                conn.executemany(
+                    "INSERT INTO spots(ts,utc,freq,call,mode,band,dxcc,spotter,lat,lon,comment) "
+                    "VALUES (?,?,?,?,?,?,?,?,?,?,?)", rows)
+            total += len(rows)
+            rows = [] if len(rows) < self.batch else [self._row(x) for x in self._drain(1)]
+        return total
+
+    def _drain(self, n: int) -> List[Dict]:
+        out = []
+        while len(out) < n:
+            try: out.append(self.q.get_nowait())
+            except queue.Empty: break
+        return out
+
+    def query(self, start: Optional[float] = None, end: Optional[float] = None,
+              band: str = "", mode: str = "", call: str = "", dxcc: str = "",
+              cursor: Optional[int] = None, limit: int = 100) -> Dict:
+        """Filtre + pagination par clé (id décroissant : `cursor` = dernier id reçu)."""
+        where, args = [], []
+        if start is not None: where.append("ts >= ?"); args.append(start)
+        if end is not None:   where.append("ts < ?");  args.append(end)
+        if band: where.append("band = ?"); args.append(band)
+        if mode: where.append("mode = ?"); args.append(mode.upper())
+        if dxcc: where.append("dxcc = ?"); args.append(dxcc)
+        if call:
+            call = call.upper()
+            if call.endswith("*"):
+                # préfixe : bornes d'intervalle pour rester sur l'index (call, ts)
+                p = call.rstrip("*")
+                where.append("call >= ? AND call < ?"); args += [p, p + "\uffff"]
+            else:
+                where.append("call = ?"); args.append(call)
+        if cursor is not None: where.append("id < ?"); args.append(cursor)
+        limit = max(1, min(HISTORY_MAX_LIMIT, limit))
+        sql = "SELECT * FROM spots"
+        if where: sql += " WHERE " + " AND ".join(where)
+        sql += " ORDER BY id DESC LIMIT ?"
+        rows = self._conn().execute(sql, args + [limit]).fetchall()
+        spots = []
+        for r in rows:
+            d = {k: r[k] for k in self.COLS}
+            d["freq"] = str(d["freq"])
+            d["grid"] = ""
+            d["id"] = r["id"]
+            d["timestamp"] = datetime.fromtimestamp(r["ts"], timezone.utc).isoformat()
+            spots.append(d)
+        nxt = spots[-1]["id"] if len(spots) == limit else None
+        return {"spots": spots, "next_cursor": nxt}
+
+    def close(self):
+        c = getattr(self._local, "conn", None)
+        if c is not None:
+            try: c.close()
+            except Exception: pass
+            self._local.conn = None
+
+# =========================
+# État partagé ingestion -> workers HTTP (ROLE=ingest / web)
+# =========================
+class SharedState:
+    """
+    État publié par le process d'ingestion pour les workers HTTP (sqlite3, WAL).
+    Table spots : la fenêtre courante, une ligne par seq ; chaque écriture
+    (nouveau spot, mise à jour nspotters, valeur kv) prend un numéro `ver`
+    croissant, un lecteur ne relit que ver > dernier vu. Table kv : statut,
+    RSS et « epoch » (change à chaque démarrage de l'ingestion : relecture
+    complète). Un seul écrivain, le thread « shared », par lots.
+    """
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS spots (seq INTEGER PRIMARY KEY, ver INTEGER NOT NULL, data TEXT NOT NULL);
+        CREATE INDEX IF NOT EXISTS idx_spots_ver ON spots(ver);
+        CREATE TABLE IF NOT EXISTS kv (key TEXT PRIMARY KEY, ver INTEGER NOT NULL, data TEXT NOT NULL);
+    """
+
+    def __init__(self, path: str, keep: int = MAX_SPOTS):
+        self.path = os.path.abspath(path)  # relatif au répertoire courant : ingestion et web doivent partager le même
+        self.keep = max(1, keep)
+        self.q: "queue.Queue[Tuple[str, object]]" = queue.Queue()
+        self._local = threading.local()
+        conn = self._conn()
+        conn.executescript(self.SCHEMA)
+        conn.commit()
+        self.ver = 0
+
+    def _conn(self) -> sqlite3.Connection:
+        # une connexion par thread, recréée après fork (workers gunicorn)
+        c = getattr(self._local, "conn", None)
+        if c is None or self._local.pid != os.getpid():
+            c = self._local.conn = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+            c.execute("PRAGMA journal_mode=WAL")
+            c.execute("PRAGMA synchronous=NORMAL")
+            self._local.pid = os.getpid()
+        return c
+
+    # --- écrivain (ingestion) ---
+    def reset(self, spots: List, epoch: str):
+        """Remplace la fenêtre publiée (démarrage de l'ingestion)."""
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute("SELECT MAX(v) FROM (SELECT MAX(ver) v FROM spots UNION ALL SELECT MAX(ver) FROM kv)").fetchone()
+            self.ver = (row[0] or 0)
+            conn.execute("DELETE FROM spots")
+            rows = []
+            for sp in reversed(spots):
+                self.ver += 1
+                rows.append((sp.get("seq"), self.ver, json.dumps(spot_json(sp), ensure_ascii=False)))
+            conn.executemany("INSERT OR REPLACE INTO spots(seq, ver, data) VALUES (?,?,?)", rows)
+            self.ver += 1
+            conn.execute("INSERT OR REPLACE INTO kv(key, ver, data) VALUES ('epoch', ?, ?)", (self.ver, json.dumps(epoch)))
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def put(self, spot):
+        """Nouveau spot ou spot mis à jour : écrit (sérialisé) au prochain flush."""
+        self.q.put(("spot", spot))
+
+    def set(self, key: str, data):
+        self.q.put((key, data))
+
+    def flush(self, block_first: float = 0) -> int:
+        try:
+            first = self.q.get(timeout=block_first) if block_first else self.q.get_nowait()
+        except queue.Empty:
+            return 0
+        items = [first]
+        while True:
+            try: items.append(self.q.get_nowait())
+            except queue.Empty: break
+        spots, kv, newest = [], [], 0
+        for key, data in items:
+            self.ver += 1
+            if key == "spot":
+                seq = data.get("seq") or 0
+                newest = max(newest, seq)
+                spots.append((seq, self.ver, json.dumps(spot_json(data), ensure_ascii=False)))
+            else:
+                kv.append((key, self.ver, json.dumps(data, ensure_ascii=False)))
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.executemany("INSERT OR REPLACE INTO spots(seq, ver, data) VALUES (?,?,?)", spots)
+            conn.executemany("INSERT OR REPLACE INTO kv(key, ver, data) VALUES (?,?,?)", kv)
+            if newest:
+                conn.execute("DELETE FROM spots WHERE seq <= ?", (newest - self.keep,))
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return len(items)
+
+    # --- lecteurs (workers HTTP) ---
+    def read(self, since_ver: int = 0) -> Tuple[int, Dict[str, object], List[Dict]]:
+        """(ver max, valeurs kv modifiées, spots écrits) depuis since_ver, dans un même instantané."""
+        conn = self._conn()
+        conn.execute("BEGIN")
+        try:
+            kv = conn.execute("SELECT key, ver, data FROM kv WHERE ver > ?", (since_ver,)).fetchall()
+            # par seq : un spot mis à jour avant d'avoir été lu reste à sa place
+            rows = conn.execute("SELECT ver, data FROM spots WHERE ver > ? ORDER BY seq", (since_ver,)).fetchall()
+        finally:
+            conn.execute("COMMIT")
+        ver = max([since_ver] + [r[1] for r in kv] + [r[0] for r in rows])
+        return ver, {k: json.loads(d) for k, _, d in kv}, [json.loads(d) for _, d in rows]
+
+    def close(self):
+        c = getattr(self._local, "conn", None)
+        if c is not None:
+            try: c.close()
+            except Exception: pass
+            self._local.conn = None
+
+# =========================
+# Métriques (format Prometheus, /metrics)
+# =========================
+LATENCY_BUCKETS = (5e-6, 1e-5, 2.5e-5, 5e-5, 1e-4, 2.5e-4, 5e-4, 1e-3, 2.5e-3, 5e-3,
+                   1e-2, 2.5e-2, 5e-2, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)  # sec
+
+def _fmt_num(v) -> str:
+    if v == float("inf"): return "+Inf"
+    return repr(float(v)) if isinstance(v, float) else str(v)
+
+class Histogram:
+    """Histogramme à bornes fixes : observe() = bisect + 2 additions sous un petit verrou."""
+    __slots__ = ("bounds", "counts", "sum", "_lock")
+    def __init__(self, bounds: Tuple[float, ...] = LATENCY_BUCKETS):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)  # dernière case : > plus grande borne
+        self.sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, v: float):
+        i = bisect_left(self.bounds, v)  # le="borne" : v <= borne
+        with self._lock:
+            self.counts[i] += 1
+            self.sum += v
+
+    def samples(self, labels: Dict) -> List:
+        with self._lock:
+            counts, total = list(self.counts), self.sum
+        out, acc = [], 0
+        for b, c in zip(self.bounds + (float("inf"),), counts):
+            acc += c
+            out.append(["_bucket", dict(labels, le=_fmt_num(b)), acc])
+        out.append(["_sum", labels, total])
+        out.append(["_count", labels, acc])
+        return out
+
+class Metrics:
+    """
+    Registre minimal : compteurs et histogrammes étiquetés, jauges calculées à
+    la lecture. families() donne une forme JSON (publiée par l'ingestion dans
+    SHARED_DB) ; render() produit le format texte Prometheus 0.0.4.
+    """
+    def __init__(self):
+        self._meta: Dict[str, Tuple[str, str]] = {}  # nom -> (type, aide), ordre de déclaration
+        self._counters: Dict[Tuple, float] = {}      # (nom, étiquettes triées) -> valeur
+        self._hists: Dict[Tuple, Histogram] = {}
+        self._collectors: Dict[str, object] = {}     # clé -> fn() -> [(nom, étiquettes, valeur)]
+        self._lock = threading.Lock()
+
+    def declare(self, name: str, kind: str, help_: str):
+        self._meta.setdefault(name, (kind, help_))
+
+    def counter(self, name: str, help_: str, **labels) -> Tuple:
+        """Déclare un compteur ; la clé renvoyée sert à inc() sur le chemin chaud."""
+        self.declare(name, "counter", help_)
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters.setdefault(key, 0)
+        return key
+
+    def inc(self, key: Tuple, n: float = 1):
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + n
+
+    def histogram(self, name: str, help_: str, **labels) -> Histogram:
+        self.declare(name, "histogram", help_)
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            h = self._hists.get(key)
+            if h is None: h = self._hists[key] = Histogram()
+        return h
+
+    def collect(self, key: str, fn):
+        """Valeurs lues à chaque export (jauges, compteurs tenus ailleurs) ; même clé = remplacée."""
+        self._collectors[key] = fn
+
+    def families(self, **const) -> List:
+        """[[nom, type, aide, [[suffixe, étiquettes, valeur], ...]], ...] ; const ajouté à chaque série."""
+        series = defaultdict(list)
+        with self._lock:
+            counters, hists = list(self._counters.items()), list(self._hists.items())
+        for (name, labels), v in counters:
+            series[name].append(["", dict(labels, **const), v])
+        for (name, labels), h in hists:
+            series[name].extend(h.samples(dict(labels, **const)))
+        for fn in list(self._collectors.values()):
+            try:
+                for name, labels, v in fn():
+                    series[name].append(["", dict(labels, **const), v])
+            except Exception as e:
+                logger.debug(f"[METRICS] collecteur: {e}")
+        return [[name, kind, help_, series[name]] for name, (kind, help_) in self._meta.items() if series[name]]
+
+    @staticmethod
+    def render(*groups: List) -> str:
+        """Texte Prometheus ; les familles de même nom (plusieurs process) sont fusionnées."""
+        merged: "OrderedDict[str, List]" = OrderedDict()
+        for families in groups:
+            for name, kind, help_, samples in families:
+                if name not in merged: merged[name] = [kind, help_, []]
+                merged[name][2].extend(samples)
+        out = []
+        for name, (kind, help_, samples) in merged.items():
+            out.append(f"# HELP {name} {help_}")
+            out.append(f"# TYPE {name} {kind}")
+            for suffix, labels, v in samples:
+                lab = ",".join('{}="{}"'.format(k, str(x).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"))
+                               for k, x in labels.items())
+                out.append(f"{name}{suffix}{{{lab}}} {_fmt_num(v)}" if lab else f"{name}{suffix} {_fmt_num(v)}")
+        return "\n".join(out) + "\n"
+
+class TimedRLock:
+    """
+    RLock qui mesure l'attente quand il est déjà pris. Chemin libre : un
+    acquire non bloquant, sans horloge. Les compteurs sont modifiés verrou
+    tenu, donc sans course.
+    """
+    __slots__ = ("_lock", "wait", "acquired", "contended")
+    def __init__(self, wait: Histogram):
+        self._lock = threading.RLock()
+        self.wait = wait
+        self.acquired = self.contended = 0
+
+    def acquire(self, blocking: bool = True, timeout: float = -1) -> bool:
+        if self._lock.acquire(False):
+            self.acquired += 1
+            return True
+        if not blocking: return False
+        t0 = time.perf_counter()
+        if not self._lock.acquire(True, timeout): return False
+        self.acquired += 1
+        self.contended += 1
+        self.wait.observe(time.perf_counter() - t0)
+        return True
+
+    def release(self):
+        self._lock.release()
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc):
+        self._lock.release()
+
+metrics = Metrics()
+M_LINES       = metrics.counter("rsw_lines_total", "Lignes cluster reçues (après découpage)")
+M_SPOTS       = metrics.counter("rsw_spots_total", "Spots ajoutés à la fenêtre")
+M_DUPLICATES  = metrics.counter("rsw_spot_duplicates_total", "Spots fusionnés par le dédoublonnage")
+M_PARSE_FAIL  = metrics.counter("rsw_parse_failures_total", "Lignes « DX » non reconnues par le parseur")
+M_DXCC_UNK    = metrics.counter("rsw_dxcc_unknown_total", "Spots dont l'entité DXCC est inconnue")
+M_RECV_BYTES  = metrics.counter("rsw_recv_bytes_total", "Octets lus sur le socket cluster")
+H_RECV        = metrics.histogram("rsw_recv_seconds", "Durée de socket.recv() (attente incluse)")
+H_FRAMING     = metrics.histogram("rsw_framing_seconds", "Découpage en lignes d'un bloc reçu")
+H_PARSE       = metrics.histogram("rsw_parse_seconds", "parse_dx_line (DXCC compris)")
+H_DXCC        = metrics.histogram("rsw_dxcc_lookup_seconds", "dxcc_lookup hors cache (résolution par préfixe)")
+H_APPEND      = metrics.histogram("rsw_append_seconds", "Ajout d'un spot à la fenêtre (attente du verrou comprise)")
+H_PERSIST     = metrics.histogram("rsw_persist_seconds", "save_spots (journal ou spots.json)")
+H_LOCK_WAIT   = metrics.histogram("rsw_lock_wait_seconds", "Attente sur le verrou principal, acquisitions contendues seulement")
+metrics.declare("rsw_http_requests_total", "counter", "Requêtes HTTP par route et code")
+metrics.declare("rsw_http_request_seconds", "histogram", "Durée de traitement HTTP par route (hors envoi des flux SSE)")
+metrics.declare("rsw_lock_acquisitions_total", "counter", "Acquisitions du verrou principal")
+metrics.declare("rsw_lock_contended_total", "counter", "Acquisitions du verrou principal qui ont dû attendre")
+metrics.declare("rsw_dxcc_cache_hits_total", "counter", "Succès du cache DXCC (depuis le dernier rechargement de la table)")
+metrics.declare("rsw_dxcc_cache_misses_total", "counter", "Échecs du cache DXCC (depuis le dernier rechargement de la table)")
+metrics.declare("rsw_sse_dropped_total", "counter", "Clients SSE décrochés (file pleine)")
+metrics.declare("rsw_window_spots", "gauge", "Spots dans la fenêtre en mémoire")
+metrics.declare("rsw_dirty_spots", "gauge", "Spots pas encore persistés")
+metrics.declare("rsw_sse_clients", "gauge", "Clients SSE connectés")
+metrics.declare("rsw_cluster_connected", "gauge", "Connexion au cluster (1 = connecté)")
+
 # =========================
 # App core
 # =========================
 class RadioSpotWatcher:
-    def __init__(self):
+    def __init__(self, role: str = ROLE):
+        self.role = role
         self.app = Flask(__name__)
-        self.spots = deque(maxlen=MAX_SPOTS)
+        if _ORJSON:
+            self.app.json = FastJSONProvider(self.app)
+        self.spots = self._new_spot_store()
 
         self.current_cluster = CLUSTER_PRIMARY
         self.cluster_socket: Optional[socket.socket] = None
         self.cluster_connected = False
+        self.feeds: List[ClusterFeed] = parse_clusters(CLUSTERS)
 
         self.dxcc_map: Dict[str, Dict] = {}
         self.sorted_prefixes: List[str] = []
+        self.prefix_lengths: List[int] = []
+        self.dxcc_cache = LRUCache(DXCC_CACHE_SIZE)
+        self._prefix_index = ({}, [])  # (dxcc_map, longueurs) remplacés d'un bloc
         self.dxcc_update_date = "unknown"
 
         self.rss_data: List[Dict] = []
-        self.most_wanted = [
-            {"name": "Bouvet Island",           "flag": "🇧🇻", "prefix": "3Y0"},
-            {"name": "South Sandwich Islands",  "flag": "🇬🇸", "prefix": "VP8"},
-            {"name": "Amsterdam & St Paul",     "flag": "🇫🇷", "prefix": "FT5"},
-            {"name": "Baker Island",            "flag": "🇺🇸", "prefix": "KH1"},
-            {"name": "North Korea",             "flag": "🇰🇵", "prefix": "HL9"},
-            {"name": "Clipperton Island",       "flag": "🇫🇷", "prefix": "FO0"},
-            {"name": "Heard Island",            "flag": "🇦🇺", "prefix": "VK0"}
-        ]
-
-        self.lock = threading.RLock()
+        self.rss_version = 0
+        self.rss_feeds: Dict[str, Dict] = {}  # url -> {"etag", "modified", "entries"}
+        self.wanted = MostWanted(MOST_WANTED_FILE)
+
+        self.lock = TimedRLock(H_LOCK_WAIT)
         self.stop_event = threading.Event()
 
-        # Charge DXCC (création locale + tentative de mise à jour en ligne)
-        self.ensure_local_dxcc_then_update()
-        self.sorted_prefixes = sorted(self.dxcc_map.keys(), key=len, reverse=True)
+        # Numéro de séquence des spots + dates de modif. (ETag / Last-Modified)
+        self.spot_seq = 0
+        self.spots_version = 0  # change aussi quand un spot existant est mis à jour (dédup)
+        self.deduper: Optional[SpotDeduper] = SpotDeduper() if DEDUP_WINDOW > 0 else None
+        self.stats = SpotStats()
+        now = time.time()
+        self.mtimes: Dict[str, float] = {"spots": now, "rss": now}
+        self.view = SpotView(mtime=now)  # lu sans verrou par les routes ; cf. _publish_view
+        self._pending: Optional[List] = []  # ajoutés depuis la dernière vue ; None = vue à reconstruire
+        self._publish_lock = threading.Lock()  # une publication à la fois (hors self.lock)
+        self.last_saved = ""
+
+        # Persistance différée (write-behind) : le lecteur cluster marque
+        # seulement les spots comme « sales », persist_worker écrit.
+        self.dirty_spots = 0
+        self.marked_total = self.saved_marked = 0  # compteurs croissants : dirty = écart
+        self.persist_event = threading.Event()
+        self.journal: Optional[SpotJournal] = (SpotJournal(SPOTS_JOURNAL, JOURNAL_KEEP)
+                                               if SPOTS_BACKEND == "journal" and role != "web" else None)
+        self.history: Optional[SpotHistory] = None
+        self.broadcaster = SpotBroadcaster()
+        self.watchlist = WatchlistEngine(WATCHLIST_FILE, self.broadcaster)
+        self.snapshots = SnapshotCache()
+        if HISTORY_DB:
+            try:
+                self.history = SpotHistory(HISTORY_DB)
+                logger.info(f"[HISTORY] Base SQLite {HISTORY_DB}")
+            except Exception as e:
+                logger.warning(f"[HISTORY] Désactivé : {e}")
+
+        # État partagé : publié par l'ingestion, relu par les workers ROLE=web
+        self.shared: Optional[SharedState] = SharedState(SHARED_DB) if SHARED_DB else None
+        self.shared_ver = 0
+        self.shared_epoch: Optional[str] = None
+        self.shared_status: Dict = {}
+        self.shared_metrics: List = []
+        if role in ("web", "ingest") and not self.shared:
+            raise RuntimeError(f"ROLE={role} nécessite SHARED_DB")
+
+        if role == "web":
+            # Worker HTTP sans état : ni DXCC ni fichiers, tout vient de SHARED_DB
+            self.sync_shared()
+            if self.shared_epoch is None:
+                logger.warning(f"[SHARED] {self.shared.path} : aucune ingestion n'y a encore publié "
+                               f"(même SHARED_DB et même répertoire courant que ROLE=ingest ?)")
+        else:
+            # Charge DXCC local (création si absent) ; la MAJ en ligne passe par dxcc_worker
+            self.load_local_dxcc()
 
-        # Spots persistés
-        self.load_spots_from_file()
+            # Spots persistés, RSS du dernier passage (servis avant le premier GET)
+            self.load_spots_from_file()
+            self.load_rss_cache()
 
         # Routes + workers
         self.setup_routes()
         self.threads: List[threading.Thread] = []
+        metrics.collect("watcher", self._metric_values)
 
     # ------------- DXCC -------------
     @staticmethod
@@ -121,42 +1862,131 @@ class RadioSpotWatcher:
             "ZS": {"country": "South Africa",    "lat":-29.0,  "lon":  24.0,  "continent": "AF"},
         }
 
-    def ensure_local_dxcc_then_update(self):
+    def load_local_dxcc(self):
         # 1) Charge local ou crée fallback
         local_loaded = False
         if os.path.exists(DXCC_FILE):
             try:
                 with open(DXCC_FILE, "r", encoding="utf-8") as f:
                     data = json.load(f)
-                self.dxcc_map = self._coerce_any_dxcc_format(data)
-                logger.info(f"[DXCC] Fichier local chargé ({len(self.dxcc_map)} entrées)")
+                dxcc_map = self._coerce_any_dxcc_format(data)
+                logger.info(f"[DXCC] Fichier local chargé ({len(dxcc_map)} entrées)")
                 local_loaded = True
             except Exception as e:
                 logger.warning(f"[DXCC] Local invalide, fallback : {e}")
 
         if not local_loaded:
-            self.dxcc_map = self._fallback_dxcc_min()
-            with open(DXCC_FILE, "w", encoding="utf-8") as f:
-                json.dump(self.dxcc_map, f, ensure_ascii=False, indent=2)
-            logger.info(f"[DXCC] Création locale par défaut ({len(self.dxcc_map)} entrées)")
+            dxcc_map = self._fallback_dxcc_min()
+            self._write_json_atomic(DXCC_FILE, dxcc_map, indent=2)
+            # l'ETag éventuel ne décrit plus le fichier : le prochain GET sera complet
+            try: os.remove(DXCC_META_FILE)
+            except OSError: pass
+            logger.info(f"[DXCC] Création locale par défaut ({len(dxcc_map)} entrées)")
+
+        # 2) Date réelle : celle de la dernière MAJ en ligne, sinon celle du fichier
+        updated = self._read_dxcc_meta().get("updated")
+        if not updated:
+            updated = datetime.fromtimestamp(os.path.getmtime(DXCC_FILE), timezone.utc).isoformat()
+        self.dxcc_update_date = updated[:10]
+
+        # 3) Index des préfixes (recherche en O(longueur de l'indicatif))
+        self._install_dxcc(dxcc_map)
+
+    @staticmethod
+    def _write_json_atomic(path: str, data, indent: Optional[int] = None):
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"  # persist / arrêt en parallèle
+        with open(tmp, "wb") as f:
+            f.write(json_bytes(data, indent))
+        os.replace(tmp, path)
 
-        # 2) Tente MAJ en ligne (non bloquant si échec)
+    @staticmethod
+    def _read_dxcc_meta() -> Dict:
         try:
-            logger.info(f"[DXCC] Tentative de mise à jour en ligne: {DXCC_REMOTE_URL}")
-            r = requests.get(DXCC_REMOTE_URL, timeout=15)
-            r.raise_for_status()
-            data = r.json()
-            updated = self._coerce_any_dxcc_format(data)
-            if len(updated) >= len(self.dxcc_map):  # garde seulement si mieux ou égal
-                self.dxcc_map = updated
-                with open(DXCC_FILE, "w", encoding="utf-8") as f:
-                    json.dump(self.dxcc_map, f, ensure_ascii=False, indent=2)
-                self.dxcc_update_date = datetime.now(timezone.utc).strftime("%Y-%m-%d")
-                logger.info(f"[DXCC] Mise à jour réussie ({len(self.dxcc_map)} entrées)")
-            else:
-                logger.info(f"[DXCC] MAJ ignorée (trop petite : {len(updated)} < {len(self.dxcc_map)})")
-        except Exception as e:
-            logger.warning(f"[DXCC] MAJ en ligne échouée : {e}")
+            with open(DXCC_META_FILE, "r", encoding="utf-8") as f:
+                meta = json.load(f)
+            return meta if isinstance(meta, dict) else {}
+        except (OSError, ValueError):
+            return {}
+
+    def refresh_dxcc(self) -> bool:
+        """
+        GET conditionnel de DXCC_REMOTE_URL (If-None-Match / If-Modified-Since
+        d'après dxcc.json.meta). 304 : rien à faire. 200 : la nouvelle table
+        est gardée si elle est au moins aussi grande, écrite sur disque puis
+        installée d'un bloc. Retourne True si la table a changé.
+        """
+        if not DXCC_REMOTE_URL:
+            return False
+        meta = self._read_dxcc_meta()
+        headers = {}
+        if meta.get("url") == DXCC_REMOTE_URL:
+            if meta.get("etag"): headers["If-None-Match"] = meta["etag"]
+            if meta.get("last_modified"): headers["If-Modified-Since"] = meta["last_modified"]
+        r = requests.get(DXCC_REMOTE_URL, headers=headers, timeout=15)
+        now = datetime.now(timezone.utc).isoformat()
+        if r.status_code == 304:
+            meta["checked"] = now
+            self._write_json_atomic(DXCC_META_FILE, meta, indent=1)
+            logger.info("[DXCC] Table distante inchangée (304)")
+            return False
+        r.raise_for_status()
+        updated = self._coerce_any_dxcc_format(r.json())
+        meta = {"url": DXCC_REMOTE_URL, "etag": r.headers.get("ETag"),
+                "last_modified": r.headers.get("Last-Modified"),
+                "updated": meta.get("updated"), "checked": now}
+        changed = len(updated) >= len(self.dxcc_map)  # garde seulement si mieux ou égal
+        if changed:
+            self._write_json_atomic(DXCC_FILE, updated, indent=2)
+            meta["updated"] = now
+        self._write_json_atomic(DXCC_META_FILE, meta, indent=1)
+        if not changed:
+            logger.info(f"[DXCC] MAJ ignorée (trop petite : {len(updated)} < {len(self.dxcc_map)})")
+            return False
+        self._install_dxcc(updated)
+        self.dxcc_update_date = now[:10]
+        logger.info(f"[DXCC] Mise à jour réussie ({len(updated)} entrées)")
+        return True
+
+    def dxcc_worker(self):
+        # Premier essai dès le démarrage (en arrière-plan), puis toutes les DXCC_REFRESH_HOURS
+        while not self.stop_event.is_set():
+            try:
+                self.refresh_dxcc()
+            except Exception as e:
+                logger.warning(f"[DXCC] MAJ en ligne échouée : {e}")
+            if self.stop_event.wait(max(60.0, DXCC_REFRESH_HOURS * 3600)): break
+
+    def _install_dxcc(self, dxcc_map: Dict[str, Dict]):
+        """Remplace la table DXCC pendant que les lookups tournent, puis re-résout les most wanted."""
+        self.dxcc_map = dxcc_map
+        self._rebuild_prefix_index()
+        self.wanted.resolve(dxcc_map)
+
+    def _rebuild_prefix_index(self):
+        """
+        Index par longueur : au lieu de parcourir tous les préfixes, on teste
+        call[:n] dans dxcc_map pour chaque longueur n connue (de la plus longue
+        à la plus courte). Même résultat que le scan linéaire trié par longueur.
+        Appelé à chaque remplacement de dxcc_map. La table et ses longueurs sont
+        publiées en un seul tuple, et le cache est remplacé (pas vidé) : un
+        lookup en cours sur l'ancienne table ne peut pas polluer le nouveau.
+        """
+        dm = self.dxcc_map
+        self.sorted_prefixes = sorted(dm.keys(), key=len, reverse=True)
+        self.prefix_lengths = sorted({len(p) for p in dm}, reverse=True)
+        self._prefix_index = (dm, self.prefix_lengths)
+        self.dxcc_cache = LRUCache(self.dxcc_cache.maxsize)
+
+    @staticmethod
+    def _longest_prefix(call: str, index) -> Optional[str]:
+        n_call = len(call)
+        dm, lengths = index
+        for n in lengths:
+            if n > n_call: continue
+            p = call[:n]
+            if p in dm:
+                return p
+        return None
 
     def _coerce_any_dxcc_format(self, data) -> Dict[str, Dict]:
         """
@@ -207,113 +2037,328 @@ class RadioSpotWatcher:
     def dxcc_lookup(self, callsign: str) -> Dict:
         if not self.dxcc_map:
             return {"country": "Unknown", "lat": 0, "lon": 0, "continent": "??"}
+        key = callsign or ""
+        cache = self.dxcc_cache  # une seule lecture : cf. _rebuild_prefix_index
+        d = cache.get(key)
+        if d is None:
+            t0 = time.perf_counter()  # succès du cache : compteurs seulement (coût < horloge)
+            d = self._dxcc_resolve(key)
+            cache.put(key, d)
+            H_DXCC.observe(time.perf_counter() - t0)
+        return d
+
+    def _dxcc_resolve(self, callsign: str) -> Dict:
         raw = (callsign or "").upper()
         base = self._clean_call(raw)
-        # match sur préfixe le plus long
-        for pref in self.sorted_prefixes:
-            if base.startswith(pref):
-                return self.dxcc_map.get(pref, {"country":"Unknown","lat":0,"lon":0,"continent":"??"})
-        # essai brut
-        for pref in self.sorted_prefixes:
-            if raw.startswith(pref):
-                return self.dxcc_map.get(pref, {"country":"Unknown","lat":0,"lon":0,"continent":"??"})
+        # match sur préfixe le plus long, puis essai brut (même index pour les deux)
+        index = self._prefix_index
+        pref = self._longest_prefix(base, index)
+        if pref is None:
+            pref = self._longest_prefix(raw, index)
+        if pref is not None:
+            return index[0][pref]
         return {"country":"Unknown","lat":0,"lon":0,"continent":"??"}
 
     # ------------- Spots -------------
     DX_RE = re.compile(r'(?:DX (?:de|from)?\s*)([A-Z0-9/]+)[:\s]*\s*([0-9.]+)\s+([A-Z0-9/]+)\s*(.*?)\s*(\d{3,4}Z)?\s*(.*)', re.I)
 
+    # Plans de bande (kHz) : bornes triées pour bisect
+    BAND_EDGES = (
+        (1800, 2000, "160m"), (3500, 4000, "80m"), (7000, 7300, "40m"),
+        (10100, 10150, "30m"), (14000, 14350, "20m"), (18068, 18168, "17m"),
+        (21000, 21450, "15m"), (24890, 24990, "12m"), (28000, 29700, "10m"),
+        (50000, 54000, "6m"), (144000, 148000, "2m"), (430000, 440000, "70cm"),
+        (10488000, 10492000, "QO-100"),
+    )
+    BAND_STARTS = [lo for lo, _, _ in BAND_EDGES]
+    # Mots-clés de mode (et QO-100) trouvés en une seule passe sur le commentaire
+    MODE_KW_RE = re.compile(r"QO-?100|FT8|FT4|CW|SSB|USB|LSB|RTTY|PSK|MFSK")
+    CW_FALLBACK_BANDS = frozenset(("160m", "80m", "40m", "20m", "15m", "10m"))
+
+    BAND_ENDS = [hi for _, hi, _ in BAND_EDGES]
+    BAND_NAMES = [name for _, _, name in BAND_EDGES]
+
+    def _band_of(self, freq: float) -> str:
+        i = bisect_right(self.BAND_STARTS, freq) - 1
+        return self.BAND_NAMES[i] if i >= 0 and freq <= self.BAND_ENDS[i] else "UNK"
+
     def _detect_mode_band(self, freq_str: str, comment: str = "") -> Tuple[str, str]:
         try:
             freq = float(freq_str)
         except Exception:
             return "UNK", "UNK"
-        # band
-        if 1800 <= freq <= 2000: band = "160m"
-        elif 3500 <= freq <= 4000: band = "80m"
-        elif 7000 <= freq <= 7300: band = "40m"
-        elif 10100 <= freq <= 10150: band = "30m"
-        elif 14000 <= freq <= 14350: band = "20m"
-        elif 18068 <= freq <= 18168: band = "17m"
-        elif 21000 <= freq <= 21450: band = "15m"
-        elif 24890 <= freq <= 24990: band = "12m"
-        elif 28000 <= freq <= 29700: band = "10m"
-        elif 50000 <= freq <= 54000: band = "6m"
-        elif 144000 <= freq <= 148000: band = "2m"
-        elif 430000 <= freq <= 440000: band = "70cm"
-        elif 10488000 <= freq <= 10492000: band = "QO-100"
-        else: band = "UNK"
-        up = (comment or "").upper()
-        if "QO-100" in up or "QO100" in up: band = "QO-100"
-        # mode
-        if "FT8" in up: mode = "FT8"
-        elif "FT4" in up: mode = "FT4"
-        elif "CW" in up or "QCW" in up: mode = "CW"
-        elif "SSB" in up or "USB" in up or "LSB" in up: mode = "SSB"
-        elif any(x in up for x in ("RTTY","PSK","MFSK")): mode = "DIGI"
-        else:
-            if band in ("160m","80m","40m") and (freq % 1000) < 200: mode = "CW"
-            elif band in ("20m","15m","10m") and (freq % 1000) < 200: mode = "CW"
-            elif (freq % 1000 > 70) and (freq % 1000 < 80): mode = "FT8"
+        band = self._band_of(freq)
+        mode = None
+        kw = self.MODE_KW_RE.findall(comment.upper()) if comment else None
+        if kw:
+            if "QO-100" in kw or "QO100" in kw: band = "QO-100"
+            # même priorité qu'avant : FT8 > FT4 > CW > SSB > DIGI
+            if "FT8" in kw: mode = "FT8"
+            elif "FT4" in kw: mode = "FT4"
+            elif "CW" in kw: mode = "CW"
+            elif "SSB" in kw or "USB" in kw or "LSB" in kw: mode = "SSB"
+            elif "RTTY" in kw or "PSK" in kw or "MFSK" in kw: mode = "DIGI"
+        if mode is None:
+            khz = freq % 1000
+            if band in self.CW_FALLBACK_BANDS and khz < 200: mode = "CW"
+            elif 70 < khz < 80: mode = "FT8"
             else: mode = "SSB"
         return mode, band
 
-    def parse_dx_line(self, line: str) -> Optional[Dict]:
-        if not line or not (line.startswith("DX ") or line.startswith("DX de ") or line.startswith("DX from ")):
+    # Chemin rapide : mise en page standard DX Spider / AR-Cluster
+    #   "DX de SPOTTER:   14025.0  CALL         commentaire            1234Z"
+    _WS = " \t\n\r\x0b\x0c\x1c\x1d\x1e\x1f"  # = \s pour une ligne ASCII
+    _CALL_CHARS = "ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789/"
+    _DIGITS = "0123456789"
+
+    def _parse_fields_fast(self, line: str) -> Optional[Tuple[str, str, str, str, str]]:
+        """
+        (spotter, freq, call, commentaire, heure) sans regex, ou None si la
+        ligne sort de la mise en page standard (le regex prend alors le relais).
+        Donne exactement le même découpage que DX_RE sur les lignes acceptées.
+        """
+        if not line.startswith("DX de ") or not line.isascii():
             return None
+        colon = line.find(":", 6, 24)
+        if colon < 0: return None
+        spotter = line[6:colon].strip(self._WS)
+        if not spotter or spotter.strip(self._CALL_CHARS): return None
+        parts = line[colon + 1:].split(None, 2)
+        if len(parts) < 2: return None
+        freq, call = parts[0], parts[1]
+        if freq.strip("0123456789.") or call.strip(self._CALL_CHARS): return None
+        rest = parts[2] if len(parts) > 2 else ""
+        n = len(rest) - len(rest.lstrip(self._DIGITS))
+        if 3 <= n <= 4 and rest[n:n + 1] in ("Z", "z"):
+            return spotter, freq, call, rest[n + 1:].strip(), rest[:n + 1]
+        return spotter, freq, call, rest.strip(), ""
+
+    def _parse_fields_regex(self, line: str) -> Optional[Tuple[str, str, str, str, str]]:
         m = self.DX_RE.match(line)
         if not m: return None
         spotter, freq, call = m.group(1) or "", m.group(2) or "", m.group(3) or ""
         comment_part, time_part, tail = m.group(4) or "", m.group(5) or "", m.group(6) or ""
-        full_comment = (comment_part + " " + tail).strip()
+        return spotter, freq, call, (comment_part + " " + tail).strip(), time_part
+
+    def parse_dx_line(self, line: str) -> Optional[Spot]:
+        if not line or not (line.startswith("DX ") or line.startswith("DX de ") or line.startswith("DX from ")):
+            return None
+        fields = self._parse_fields_fast(line) or self._parse_fields_regex(line)
+        if not fields: return None
+        spotter, freq, call, full_comment, time_part = fields
+        now = datetime.now(timezone.utc)
         if not time_part:
-            time_part = datetime.now(timezone.utc).strftime("%H%MZ")
+            time_part = f"{now.hour:02d}{now.minute:02d}Z"
 
         mode, band = self._detect_mode_band(freq, full_comment)
-        d = self.dxcc_lookup(call)
-        return {
-            "utc": time_part,
-            "freq": freq,
-            "call": call,
-            "mode": mode,
-            "band": band,
-            "dxcc": d.get("country",""),
-            "grid": "",
-            "spotter": spotter,
-            "lat": d.get("lat",0),
-            "lon": d.get("lon",0),
-            "timestamp": datetime.now(timezone.utc).isoformat(),
-            "comment": full_comment
-        }
+        return Spot(time_part, freq, call, mode, band, spotter, full_comment,
+                    self.dxcc_lookup(call), (now - _EPOCH) // timedelta(microseconds=1))
 
     # ------------- Persist -------------
+    def _mark_dirty(self, n: int = 1):
+        with self.lock:
+            self.marked_total += n
+            self.dirty_spots += n
+            pending = self.dirty_spots
+        if pending >= SAVE_EVERY_N:
+            self.persist_event.set()
+
     def save_spots(self):
+        t0 = time.perf_counter()
+        try:
+            self._save_spots()
+        finally:
+            H_PERSIST.observe(time.perf_counter() - t0)
+
+    def _save_spots(self):
+        if self.journal:
+            try:
+                self.journal.flush()
+                if self.journal.needs_compaction:
+                    self.journal.compact()
+                with self.lock:
+                    self.dirty_spots = 0
+                    self.last_saved = datetime.now(timezone.utc).isoformat()
+            except Exception as e:
+                logger.warning(f"save_spots (journal) error: {e}")
+            return
         try:
+            # vue publiée : pas de copie sous verrou ; ce qui a été marqué après
+            # sa publication reste « sale » pour le passage suivant
+            v = self.view
+            self._write_json_atomic(SPOTS_FILE, [spot_json(x) for x in v.spots], indent=2)
             with self.lock:
-                data = list(self.spots)
-            tmp = SPOTS_FILE + ".tmp"
-            with open(tmp, "w", encoding="utf-8") as f:
-                json.dump(data, f, ensure_ascii=False, indent=2)
-            os.replace(tmp, SPOTS_FILE)
+                self.saved_marked = max(self.saved_marked, v.marked)
+                self.dirty_spots = self.marked_total - self.saved_marked
+                self.last_saved = datetime.now(timezone.utc).isoformat()
         except Exception as e:
             logger.warning(f"save_spots error: {e}")
 
     def load_spots_from_file(self):
+        if self.journal and self.journal.lines:
+            try:
+                data = self.journal.tail(MAX_SPOTS)
+                data.reverse()  # journal : plus ancien d'abord ; deque : plus récent d'abord
+                with self.lock:
+                    self.spots = self._new_spot_store(map(Spot.from_dict, data))
+                logger.info(f"[SPOTS] {len(self.spots)} spots rejoués depuis {SPOTS_JOURNAL}")
+                self._init_spot_seq()
+                return
+            except Exception as e:
+                logger.warning(f"[SPOTS] Relecture journal échouée: {e}")
         try:
             if os.path.exists(SPOTS_FILE):
-                with open(SPOTS_FILE, "r", encoding="utf-8") as f:
-                    data = json.load(f)
+                with open(SPOTS_FILE, "rb") as f:
+                    data = json_parse(f.read())
                 if isinstance(data, list):
+                    data = [Spot.from_dict(d) for d in data[:MAX_SPOTS] if isinstance(d, dict)]
                     with self.lock:
-                        self.spots = deque(data, maxlen=MAX_SPOTS)
+                        self.spots = self._new_spot_store(data)
                 logger.info(f"[SPOTS] {len(self.spots)} spots chargés")
             else:
                 logger.info("[SPOTS] Aucun fichier spots.json")
         except Exception as e:
             logger.warning(f"[SPOTS] Lecture échouée: {e}")
             with self.lock:
-                self.spots = deque(maxlen=MAX_SPOTS)
+                self.spots = self._new_spot_store()
+        self._init_spot_seq()
+
+    def _init_spot_seq(self):
+        # Reprend la séquence des spots chargés ; numérote (ancien -> récent) s'il en manque
+        with self.lock:
+            if all(isinstance(s.get("seq"), int) and s.get("seq") > 0 for s in self.spots):
+                self.spot_seq = max((s["seq"] for s in self.spots), default=0)
+            else:
+                for i, s in enumerate(reversed(self.spots), 1):
+                    s["seq"] = i
+                self.spot_seq = len(self.spots)
+            # jamais en arrière : les snapshots et vues publiés sont indexés par version
+            self.spots_version = max(self.spot_seq, self.spots_version + 1)
+            self.stats.clear()
+            for s in reversed(self.spots):
+                self._set_continent(s)
+                self.stats.add(s, _spot_epoch(s))
+            if isinstance(self.spots, SpotColumns):
+                self.spots.rebuild()
+            self._pending = None  # fenêtre remplacée : la vue repart de self.spots
+        self._publish_view()
+
+    @staticmethod
+    def _new_spot_store(items=()):
+        """Fenêtre de spots (plus récent d'abord) : deque, ou colonnes si SPOTS_STORE=columnar."""
+        if SPOTS_STORE == "columnar":
+            return SpotColumns(MAX_SPOTS, items)
+        return deque(items, maxlen=MAX_SPOTS)
+
+    def _set_continent(self, s: Dict):
+        if not s.get("continent"):
+            s["continent"] = self._spot_continent(s)  # figé : même clé à l'éviction et dans la vue
+
+    def _append_spot(self, spot: Dict):
+        with self.lock:
+            if self.spots.maxlen is not None and len(self.spots) >= self.spots.maxlen:
+                self.stats.remove(self.spots[-1])
+            self.spot_seq += 1
+            self.spots_version += 1
+            spot["seq"] = self.spot_seq
+            self._set_continent(spot)
+            self.spots.appendleft(spot)
+            self.stats.add(spot)
+            self.mtimes["spots"] = time.time()
+            if self._pending is not None: self._pending.append(spot)
+
+    def _publish_view(self):
+        """
+        Côté écriture : publie la fenêtre courante (échange de référence atomique).
+        Sous self.lock, seulement les spots ajoutés depuis la vue précédente et
+        les compteurs ; les blocs de la FrozenWindow sont construits hors verrou.
+        """
+        with self._publish_lock:
+            with self.lock:
+                if self.view.version == self.spots_version: return  # rien de neuf depuis la dernière vue
+                pending, self._pending = self._pending, []
+                new = list(self.spots) if pending is None else pending[::-1]  # plus récent d'abord
+                head = (self.spots_version, self.spot_seq, self.mtimes["spots"])
+                stats, rollups, marked = self.stats.current(), self.stats.freeze(), self.marked_total
+            base = FrozenWindow() if pending is None else self.view.spots
+            spots = base.extend(new, self.spots.maxlen)
+            self.view = SpotView(*head, spots, stats, rollups, marked)
+
+    # ------------- Filtres -------------
+    FILTER_KEYS = ("band", "mode", "call", "dxcc", "continent")
+
+    @classmethod
+    def _filter_args(cls, args) -> Dict[str, str]:
+        """Filtres non vides de la query string (band, mode, call=préfixe, dxcc, continent)."""
+        f = {k: (args.get(k) or "").strip() for k in cls.FILTER_KEYS}
+        f = {k: v for k, v in f.items() if v and v.lower() != "all"}
+        for k in ("mode", "call", "continent"):
+            if k in f: f[k] = f[k].upper()
+        if "dxcc" in f: f["dxcc"] = f["dxcc"].lower()
+        return f
+
+    def _spot_continent(self, s: Dict) -> str:
+        return s.get("continent") or self.dxcc_lookup(s.get("call","")).get("continent","")
+
+    def filter_spots(self, f: Dict[str, str], since: Optional[int] = None,
+                     v: Optional[SpotView] = None) -> List[Dict]:
+        """Spots filtrés (et seq > since) de la vue publiée, du plus récent au plus ancien (sans verrou)."""
+        return (v or self.view).spots.select(f, since)
+
+    def count_spots(self, f: Dict[str, str], v: Optional[SpotView] = None) -> Dict:
+        """Répartition bandes/modes des spots filtrés de la vue (/stats.json avec filtres)."""
+        c = (v or self.view).spots.count(f)
+        return {"bands": c["band"], "modes": c["mode"]}
 
     # ------------- Cluster -------------
+    def _ingest_line(self, line: str, publish: bool = True) -> Optional[Dict]:
+        """
+        Pipeline commun à toutes les sources : parse -> fenêtre -> journal/historique/SSE.
+        Les lecteurs de blocs passent publish=False et publient la vue une fois par bloc.
+        """
+        metrics.inc(M_LINES)
+        t0 = time.perf_counter()
+        spot = self.parse_dx_line(line)
+        H_PARSE.observe(time.perf_counter() - t0)
+        if spot is None:
+            if line.startswith("DX "): metrics.inc(M_PARSE_FAIL)
+            return None
+        if spot.get("dxcc") == "Unknown":
+            metrics.inc(M_DXCC_UNK)
+        if self.deduper is not None:
+            with self.lock:
+                dup = self.deduper.check(spot)
+                if dup is not None:
+                    self.spots_version += 1
+                    self.mtimes["spots"] = time.time()
+            if dup is not None:
+                metrics.inc(M_DUPLICATES)
+                if self.journal:
+                    self.journal.append(dup)  # même seq : remplace la ligne précédente à la relecture
+                if self.shared:
+                    self.shared.put(dup)
+                self._mark_dirty()
+                if publish: self._publish_view()
+                self.broadcaster.publish("spot_update", {"seq": dup.get("seq"), "nspotters": dup["nspotters"]})
+                return None
+        t0 = time.perf_counter()
+        self._append_spot(spot)
+        H_APPEND.observe(time.perf_counter() - t0)
+        metrics.inc(M_SPOTS)
+        self.wanted.maybe_reload()
+        self.wanted.check(spot)
+        if self.journal:
+            self.journal.append(spot)
+        if self.history:
+            self.history.add(spot)
+        if self.shared:
+            self.shared.put(spot)
+        self._mark_dirty()
+        if publish: self._publish_view()
+        self.broadcaster.publish("spot", spot)
+        self.watchlist.check(spot)
+        return spot
+
     def connect_cluster(self):
         # ferme socket précédente
         try:
@@ -336,6 +2381,7 @@ class RadioSpotWatcher:
             self.cluster_socket = s
             self.cluster_connected = True
             logger.info("[CLUSTER] Connecté")
+            self._publish_status()
         except Exception as e:
             logger.error(f"[CLUSTER] Échec: {e}")
             self.cluster_connected = False
@@ -344,28 +2390,27 @@ class RadioSpotWatcher:
     def _cluster_reader(self):
         s = self.cluster_socket
         if not s: return
-        buf = ""
+        framer = LineFramer()
         try:
             s.settimeout(5.0)
         except: pass
 
         while not self.stop_event.is_set() and self.cluster_connected and s:
             try:
-                data = s.recv(4096)
+                t0 = time.perf_counter()
+                data = s.recv(16384)
+                t1 = time.perf_counter()
+                H_RECV.observe(t1 - t0)
                 if not data:
                     logger.info("[CLUSTER] Fin de flux")
                     break
-                text = data.decode("utf-8", errors="ignore")
-                buf += text
-                while "\n" in buf:
-                    line, buf = buf.split("\n", 1)
-                    line = line.strip("\r ").strip()
-                    if not line: continue
-                    spot = self.parse_dx_line(line)
-                    if spot:
-                        with self.lock:
-                            self.spots.appendleft(spot)
-                        self.save_spots()
+                metrics.inc(M_RECV_BYTES, len(data))
+                lines = framer.feed(data)
+                H_FRAMING.observe(time.perf_counter() - t1)
+                for line in lines:
+                    self._ingest_line(line, publish=False)
+                if lines:
+                    self._publish_view()
             except socket.timeout:
                 continue
             except Exception as e:
@@ -373,6 +2418,7 @@ class RadioSpotWatcher:
                 break
 
         self.cluster_connected = False
+        self._publish_status()
         try:
             if self.cluster_socket:
                 try: self.cluster_socket.close()
@@ -391,101 +2437,541 @@ class RadioSpotWatcher:
                 time.sleep(backoff)
                 backoff = min(300, backoff * 2)
 
+    # ------------- Multi-cluster (asyncio) -------------
+    def _feeds_changed(self):
+        up = [f for f in self.feeds if f.connected]
+        self.cluster_connected = bool(up)
+        if up: self.current_cluster = (up[0].host, up[0].port)
+        self._publish_status()
+
+    async def _feed_task(self, feed: ClusterFeed):
+        backoff = 1
+        while not self.stop_event.is_set():
+            logger.info(f"[CLUSTER] Connexion {feed.name}")
+            try:
+                reader, writer = await asyncio.wait_for(asyncio.open_connection(feed.host, feed.port), 10)
+            except Exception as e:
+                logger.error(f"[CLUSTER] {feed.name} échec: {e}")
+                await asyncio.sleep(backoff)
+                backoff = min(300, backoff * 2)
+                feed.reconnects += 1
+                continue
+            backoff = 1
+            feed.connected = True
+            self._feeds_changed()
+            logger.info(f"[CLUSTER] {feed.name} connecté")
+            try:
+                writer.write((feed.login + "\n").encode("utf-8"))
+                await writer.drain()
+                framer = LineFramer()  # par blocs, comme _cluster_reader : une vue publiée par bloc
+                while not self.stop_event.is_set():
+                    data = await reader.read(16384)
+                    if not data:
+                        logger.info(f"[CLUSTER] {feed.name} fin de flux")
+                        break
+                    metrics.inc(M_RECV_BYTES, len(data))
+                    t0 = time.perf_counter()
+                    lines = framer.feed(data)
+                    H_FRAMING.observe(time.perf_counter() - t0)
+                    feed.lines += len(lines)
+                    for line in lines:
+                        if self._ingest_line(line, publish=False):
+                            feed.spots += 1
+                    if lines:
+                        self._publish_view()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"[CLUSTER] {feed.name} read error: {e}")
+            finally:
+                feed.connected = False
+                self._feeds_changed()
+                try: writer.close()
+                except Exception: pass
+            feed.reconnects += 1
+            await asyncio.sleep(1)
+
+    async def _run_feeds(self):
+        tasks = [asyncio.create_task(self._feed_task(f)) for f in self.feeds]
+        while not self.stop_event.is_set():
+            await asyncio.sleep(0.5)
+        for t in tasks: t.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def cluster_async_worker(self):
+        # une seule boucle asyncio pour tous les clusters de CLUSTERS
+        logger.info(f"[CLUSTER] Multi-cluster : {', '.join(f.name for f in self.feeds)}")
+        asyncio.run(self._run_feeds())
+
     # ------------- RSS -------------
+    def load_rss_cache(self):
+        try:
+            with open(RSS_CACHE_FILE, "r", encoding="utf-8") as f:
+                cache = json.load(f)
+        except (OSError, ValueError):
+            return
+        if not isinstance(cache, dict): return
+        self.rss_feeds = {u: c for u, c in cache.items() if u in RSS_FEEDS and isinstance(c, dict)}
+        self.rss_data = self._rss_entries()
+        logger.info(f"[RSS] Cache {RSS_CACHE_FILE} : {len(self.rss_data)} entrées")
+
+    def _rss_entries(self) -> List[Dict]:
+        # ordre de RSS_FEEDS, 8 entrées max par flux, 15 au total
+        return [e for url in RSS_FEEDS for e in self.rss_feeds.get(url, {}).get("entries", [])][:15]
+
+    @staticmethod
+    def _fetch_feed(url: str, state: Dict) -> Optional[Dict]:
+        """GET conditionnel d'un flux ; None si inchangé (304), sans reparser."""
+        headers = {}
+        if state.get("etag"): headers["If-None-Match"] = state["etag"]
+        if state.get("modified"): headers["If-Modified-Since"] = state["modified"]
+        r = requests.get(url, headers=headers, timeout=RSS_TIMEOUT)
+        if r.status_code == 304:
+            return None
+        r.raise_for_status()
+        feed = feedparser.parse(r.content, response_headers=dict(r.headers))
+        entries = []
+        for e in feed.entries[:8]:
+            summary = e.get("summary", "")
+            if len(summary) > 220: summary = summary[:220] + "…"
+            entries.append({
+                "title": e.get("title",""),
+                "link": e.get("link",""),
+                "published": e.get("published",""),
+                "summary": summary
+            })
+        return {"etag": r.headers.get("ETag"), "modified": r.headers.get("Last-Modified"), "entries": entries}
+
+    def refresh_rss(self, pool: ThreadPoolExecutor) -> bool:
+        """Tous les flux en parallèle ; un flux lent ou en erreur garde ses entrées précédentes."""
+        feeds = dict(self.rss_feeds)
+        futures = {url: pool.submit(self._fetch_feed, url, feeds.get(url, {})) for url in RSS_FEEDS}
+        deadline = time.time() + 2 * RSS_TIMEOUT  # garde-fou : un serveur qui répond au compte-gouttes
+        fetched = 0
+        for url, fut in futures.items():
+            try:
+                state = fut.result(timeout=max(0.0, deadline - time.time()))
+            except Exception as fe:
+                logger.debug(f"[RSS] {url}: {fe!r}")
+                continue
+            if state is not None:
+                feeds[url] = state
+                fetched += 1
+        if not fetched:
+            return False
+        self.rss_feeds = feeds
+        try:
+            os.makedirs(os.path.dirname(RSS_CACHE_FILE) or ".", exist_ok=True)
+            self._write_json_atomic(RSS_CACHE_FILE, feeds)
+        except OSError as e:
+            logger.warning(f"[RSS] Cache non écrit : {e}")
+        entries = self._rss_entries()
+        with self.lock:
+            changed = entries != self.rss_data
+            if changed:
+                self.rss_data = entries
+                self.rss_version += 1
+                self.mtimes["rss"] = time.time()
+        if changed and self.shared:
+            self.shared.set("rss", entries)
+        return changed
+
     def rss_worker(self):
-        while not self.stop_event.is_set():
-            entries = []
-            for url in RSS_FEEDS:
-                try:
-                    feed = feedparser.parse(url)
-                    for e in feed.entries[:8]:
-                        summary = e.get("summary", "")
-                        if len(summary) > 220: summary = summary[:220] + "…"
-                        entries.append({
-                            "title": e.get("title",""),
-                            "link": e.get("link",""),
-                            "published": e.get("published",""),
-                            "summary": summary
-                        })
-                except Exception as fe:
-                    logger.debug(f"[RSS] {url}: {fe}")
-            with self.lock:
-                self.rss_data = entries[:15]
-            for _ in range(RSS_UPDATE_INTERVAL):
-                if self.stop_event.wait(1): break
+        pool = ThreadPoolExecutor(max_workers=max(1, len(RSS_FEEDS)), thread_name_prefix="rss")
+        try:
+            while not self.stop_event.is_set():
+                self.refresh_rss(pool)
+                for _ in range(RSS_UPDATE_INTERVAL):
+                    if self.stop_event.wait(1): break
+        finally:
+            pool.shutdown(wait=False, cancel_futures=True)
 
     # ------------- Routes -------------
+    def _status_payload(self) -> Dict:
+        if self.role == "web":
+            # statut du process d'ingestion, clients SSE de ce worker
+            with self.lock: payload = dict(self.shared_status)
+            payload["stream_clients"] = len(self.broadcaster)
+            return payload
+        total = len(self.view.spots)
+        return {
+            "cluster_connected": self.cluster_connected,
+            "cluster_host": self.current_cluster[0],
+            "version": VERSION,
+            "dxcc_update": self.dxcc_update_date,
+            "last_saved": self.last_saved,
+            "total_spots": total,
+            "dxcc_cache": self.dxcc_cache.stats(),
+            "stream_clients": len(self.broadcaster),
+            "dedup_merged": self.deduper.merged if self.deduper is not None else 0,
+            "clusters": [f.status() for f in self.feeds]
+        }
+
+    def _metric_values(self) -> List:
+        """Valeurs lues à l'export /metrics (rien à tenir à jour sur le chemin chaud)."""
+        cache = self.dxcc_cache
+        out = [("rsw_lock_acquisitions_total", {}, self.lock.acquired),
+               ("rsw_lock_contended_total", {}, self.lock.contended),
+               ("rsw_dxcc_cache_hits_total", {}, cache.hits),
+               ("rsw_dxcc_cache_misses_total", {}, cache.misses),
+               ("rsw_sse_dropped_total", {}, self.broadcaster.dropped_total),
+               ("rsw_window_spots", {}, len(self.view.spots)),
+               ("rsw_sse_clients", {}, len(self.broadcaster))]
+        if self.role != "web":
+            out.append(("rsw_dirty_spots", {}, self.dirty_spots))
+            clusters = ([(f.name, f.connected) for f in self.feeds] or
+                        [("%s:%s" % self.current_cluster, self.cluster_connected)])
+            out += [("rsw_cluster_connected", {"cluster": n}, int(c)) for n, c in clusters]
+        return out
+
+    def _metrics_text(self) -> str:
+        groups = [metrics.families(role=self.role)]
+        if self.role == "web":
+            with self.lock: ingest = self.shared_metrics
+            groups.append(ingest)  # familles du process d'ingestion (role="ingest")
+        return Metrics.render(*groups)
+
+    def _publish_status(self):
+        payload = self._status_payload()
+        if self.shared and self.role != "web":
+            self.shared.set("status", payload)
+        self.broadcaster.publish("status", payload)
+
+    def _conditional(self, etag: str, mtime: Optional[float], build) -> Response:
+        """
+        Réponse 304 si le client a déjà cette version (If-None-Match, sinon
+        If-Modified-Since) ; `build` n'est appelé que si le contenu a changé.
+        mtime=None (ETag = hash du contenu, sans date fiable) : ni Last-Modified
+        ni If-Modified-Since. ETag faible (W/) : le même contenu part en br,
+        gzip ou brut selon Accept-Encoding, les octets diffèrent. Last-Modified n'a qu'une précision d'une seconde :
+        il n'est émis que pour une seconde écoulée, sinon une seconde mise à
+        jour dans la même seconde serait masquée (304 à tort).
+        """
+        lm = None
+        if mtime is not None and int(mtime) < int(time.time()):
+            lm = datetime.fromtimestamp(int(mtime), timezone.utc)
+        if request.if_none_match:
+            fresh = request.if_none_match.contains_weak(etag)
+        else:
+            ims = request.if_modified_since
+            fresh = lm is not None and ims is not None and lm <= ims
+        resp = Response(status=304) if fresh else build()
+        resp.set_etag(etag, weak=True)
+        if lm is not None: resp.last_modified = lm
+        resp.headers["Cache-Control"] = "no-cache"
+        return resp
+
+    @staticmethod
+    def _snapshot_response(snap: Snapshot) -> Response:
+        enc = None
+        if snap.gz is not None:
+            enc = accepted_encoding(("br", "gzip") if snap.br is not None else ("gzip",))
+        if enc:
+            resp = Response(snap.br if enc == "br" else snap.gz, mimetype="application/json")
+            resp.headers["Content-Encoding"] = enc
+        else:
+            resp = Response(snap.body, mimetype="application/json")
+        resp.vary.add("Accept-Encoding")
+        return resp
+
+    def _spots_snapshot(self, v: Optional[SpotView] = None):
+        v = v or self.view
+        L = [spot_json(x) for x in v.spots]
+        return v.version, {"spots": L, "map_spots": L[:MAX_MAP_SPOTS], "seq": v.seq}
+
+    def _stats_snapshot(self, v: Optional[SpotView] = None):
+        v = v or self.view  # clé : version (monotone), pas seq qui recule au changement d'epoch
+        return v.version, v.stats
+
+    def _rss_snapshot(self):
+        with self.lock:
+            return self.rss_version, {"entries": self.rss_data}
+
+    @staticmethod
+    def _etag_of(data) -> str:
+        return hashlib.md5(json.dumps(data, sort_keys=True, ensure_ascii=False).encode("utf-8")).hexdigest()
+
     def setup_routes(self):
+        @self.app.before_request
+        def _start_timer():
+            request.environ["rsw.t0"] = time.perf_counter()
+
+        @self.app.after_request
+        def _observe_request(resp):
+            t0 = request.environ.get("rsw.t0")
+            if t0 is not None:
+                route = request.endpoint or "unmatched"
+                metrics.histogram("rsw_http_request_seconds", "", route=route).observe(time.perf_counter() - t0)
+                metrics.inc(("rsw_http_requests_total", (("code", str(resp.status_code)), ("route", route))))
+            return resp
+
+        @self.app.after_request
+        def _compress(resp):
+            # réponses dynamiques (filtres, ?since=, export...) ; les snapshots arrivent déjà compressés
+            if (resp.status_code != 200 or resp.is_streamed or resp.direct_passthrough
+                    or "Content-Encoding" in resp.headers or resp.mimetype not in COMPRESS_TYPES):
+                return resp
+            resp.vary.add("Accept-Encoding")
+            enc = accepted_encoding()
+            body = resp.get_data()
+            if enc and len(body) >= GZIP_MIN_SIZE:
+                resp.set_data(compress_body(body, enc))
+                resp.headers["Content-Encoding"] = enc
+            return resp
+
+        @self.app.route("/metrics")
+        def metrics_text():
+            return Response(self._metrics_text(), content_type="text/plain; version=0.0.4; charset=utf-8")
+
         @self.app.route("/")
         def index():
-            return render_template_string(HTML, version=VERSION, max_map_spots=MAX_MAP_SPOTS)
+            return render_template_string(HTML, version=VERSION, max_map_spots=MAX_MAP_SPOTS, max_spots=MAX_SPOTS)
 
         @self.app.route("/status.json")
         def status():
-            with self.lock: total = len(self.spots)
-            return jsonify({
-                "cluster_connected": self.cluster_connected,
-                "cluster_host": self.current_cluster[0],
-                "version": VERSION,
-                "dxcc_update": self.dxcc_update_date,
-                "last_saved": datetime.now(timezone.utc).isoformat(),
-                "total_spots": total
-            })
+            payload = self._status_payload()
+            return self._conditional("status-" + self._etag_of(payload), None, lambda: jsonify(payload))
+
+        @self.app.route("/stream")
+        def stream():
+            # ?watch=3Y0*,VK0/,F5AA : motifs propres à ce client (événements « alert »), en plus de watchlist.json
+            sub = self.watchlist.subscribe(WatchlistEngine.normalize(request.args.get("watch", "").split(",")[:100]))
+            resp = Response(self.watchlist.stream(sub, self.stop_event), mimetype="text/event-stream")
+            resp.headers["Cache-Control"] = "no-cache"
+            resp.headers["X-Accel-Buffering"] = "no"
+            return resp
+
+        @self.app.route("/alerts.json")
+        def alerts_json():
+            # alertes récentes de watchlist.json ; ?since=<id> : seulement les suivantes
+            try:
+                since = int(request.args["since"]) if request.args.get("since") else None
+            except ValueError:
+                return jsonify({"error": "bad since"}), 400
+            return jsonify(self.watchlist.snapshot(since))
 
         @self.app.route("/spots.json")
         def spots_json():
-            with self.lock:
-                return jsonify({"spots": list(self.spots), "map_spots": list(self.spots)[:MAX_MAP_SPOTS]})
+            # ?since=<seq> : seulement les spots plus récents que seq
+            try:
+                since = int(request.args["since"]) if request.args.get("since") else None
+            except ValueError:
+                return jsonify({"error": "bad since"}), 400
+            f = self._filter_args(request.args)
+            v = self.view  # vue publiée : ni verrou ni copie
+            seq, version = v.seq, v.version
+            if since is None and not f:
+                return self._conditional(f"spots-{version}", v.mtime, lambda: self._snapshot_response(
+                    self.snapshots.get("spots", version, lambda: self._spots_snapshot(v))))
+            def build():
+                oldest = v.spots[-1].get("seq", 0) if v.spots else 0
+                reset = since is not None and (since < oldest - 1 or since > seq)
+                # filtres et ?since= sur la vue : corps cohérent avec seq / version (ETag)
+                L = [spot_json(x) for x in v.spots.select(f, None if reset else since)]
+                out = {"spots": L, "map_spots": L[:MAX_MAP_SPOTS], "seq": seq}
+                if reset: out["reset"] = True  # trou dans la séquence : liste complète
+                return jsonify(out)
+            return self._conditional(f"spots-{version}", v.mtime, build)
 
         @self.app.route("/rss.json")
         def rss_json():
-            with self.lock:
-                return jsonify({"entries": self.rss_data})
+            version = self.rss_version
+            return self._conditional(f"rss-{version}", self.mtimes["rss"], lambda: self._snapshot_response(
+                self.snapshots.get("rss", version, self._rss_snapshot)))
 
         @self.app.route("/wanted.json")
         def wanted_json():
-            return jsonify({"wanted": self.most_wanted})
+            # rang, nom, drapeau et entité DXCC résolue (null si absente de la table)
+            self.wanted.maybe_reload()
+            payload = self.wanted.payload()
+            return self._conditional("wanted-" + self._etag_of(payload), None,
+                                     lambda: jsonify(payload))
+
+        @self.app.route("/wanted/hits.json")
+        def wanted_hits_json():
+            # spots récents d'entités recherchées ; ?since=<id> : seulement les suivants
+            try:
+                since = int(request.args["since"]) if request.args.get("since") else None
+            except ValueError:
+                return jsonify({"error": "bad since"}), 400
+            if since is not None:
+                return jsonify(self.wanted.hits_snapshot(since)[1])
+            return self._snapshot_response(self.snapshots.get("wanted_hits", self.wanted.hit_id,
+                                                              self.wanted.hits_snapshot))
 
         @self.app.route("/stats.json")
         def stats_json():
-            with self.lock:
-                L = list(self.spots)
-            band_stats, mode_stats = defaultdict(int), defaultdict(int)
-            for s in L:
-                band_stats[s.get("band","UNK")] += 1
-                mode_stats[s.get("mode","UNK")] += 1
-            return jsonify({"bands": dict(band_stats), "modes": dict(mode_stats)})
+            # ?window=15m|2h|1d : cumuls horodatés (tous les spots reçus, pas seulement la fenêtre)
+            v = self.view  # vue publiée : ni verrou ni copie
+            if request.args.get("window"):
+                secs = _parse_window(request.args["window"])
+                if secs is None:
+                    return jsonify({"error": "bad window"}), 400
+                return jsonify(self.stats.window(secs, rollups=v.rollups))
+            f = self._filter_args(request.args)
+            if f:
+                return jsonify(self.count_spots(f, v))
+            return self._snapshot_response(self.snapshots.get("stats", v.version, lambda: self._stats_snapshot(v)))
+
+        @self.app.route("/history.json")
+        def history_json():
+            if not self.history:
+                return jsonify({"error": "history disabled (HISTORY_DB)"}), 404
+            a = request.args
+            try:
+                cursor = int(a["cursor"]) if a.get("cursor") else None
+                limit = int(a.get("limit", 100))
+            except ValueError:
+                return jsonify({"error": "bad cursor/limit"}), 400
+            return jsonify(self.history.query(
+                start=_parse_time_param(a.get("from")), end=_parse_time_param(a.get("to")),
+                band=a.get("band", ""), mode=a.get("mode", ""), call=a.get("call", ""),
+                dxcc=a.get("dxcc", ""), cursor=cursor, limit=limit))
 
         @self.app.route("/export.csv")
         def export_csv():
-            with self.lock: L = list(self.spots)
+            f = self._filter_args(request.args)
+            v = self.view
+            L = v.spots.select(f) if f else v.spots
             header = ["utc","freq","call","mode","band","dxcc","grid","spotter","lat","lon","timestamp","comment"]
-            def gen():
-                yield ",".join(header) + "\n"
-                for s in L:
-                    row = [str(s.get(h,"")).replace('"','""') for h in header]
-                    yield '"' + '","'.join(row) + '"\n'
-            resp = Response(gen(), mimetype="text/csv; charset=utf-8")
+            out = [",".join(header) + "\n"]
+            for s in L:
+                row = [str(s.get(h,"")).replace('"','""') for h in header]
+                out.append('"' + '","'.join(row) + '"\n')
+            # corps complet (fenêtre bornée par MAX_SPOTS) : compressible par _compress
+            resp = Response("".join(out), mimetype="text/csv; charset=utf-8")
             resp.headers.set("Content-Disposition", "attachment", filename="spots.csv")
             return resp
 
+    # ------------- État partagé -------------
+    def publish_shared(self):
+        """Ingestion : publie la fenêtre complète sous un nouvel epoch, puis RSS et statut."""
+        with self.lock:
+            spots, rss = list(self.spots), self.rss_data
+        self.shared.reset(spots, f"{os.getpid()}-{time.time()}")
+        self.shared.set("rss", rss)
+        self.shared.set("status", self._status_payload())
+        logger.info(f"[SHARED] {len(spots)} spots publiés dans {self.shared.path}")
+
+    def sync_shared(self) -> int:
+        """Worker HTTP : applique ce que l'ingestion a écrit depuis la dernière relecture."""
+        ver, kv, rows = self.shared.read(self.shared_ver)
+        if "epoch" in kv and kv["epoch"] != self.shared_epoch:
+            # ingestion (re)démarrée : fenêtre relue en entier
+            ver, kv, rows = self.shared.read(0)
+            spots = [Spot.from_dict(d) for d in reversed(rows)]
+            with self.lock:
+                self.spots = self._new_spot_store(spots)
+                self.mtimes["spots"] = time.time()
+            self._init_spot_seq()  # nouvelle version : invalide les snapshots (publie hors verrou)
+            self.shared_epoch = kv["epoch"]
+            rows = []
+        for d in rows:
+            self._apply_shared_spot(Spot.from_dict(d))
+        if "rss" in kv:
+            with self.lock:
+                self.rss_data = kv["rss"]
+                self.rss_version += 1
+                self.mtimes["rss"] = time.time()
+        if "metrics" in kv:
+            with self.lock:
+                self.shared_metrics = kv["metrics"]
+        if "status" in kv and kv["status"] != self.shared_status:
+            with self.lock:
+                self.shared_status = kv["status"]
+            self._publish_status()
+        self._publish_view()
+        self.shared_ver = ver
+        return len(rows)
+
+    def _apply_shared_spot(self, spot: Spot):
+        with self.lock:
+            if spot.seq > self.spot_seq:
+                self.spot_seq = spot.seq - 1  # garde la numérotation de l'ingestion
+                self._append_spot(spot)
+                old = None
+            else:
+                old = self._find_seq(spot.seq)
+                if old is None: return  # déjà sorti de la fenêtre
+                old["nspotters"] = spot.nspotters
+                self.spots_version += 1
+                self.mtimes["spots"] = time.time()
+        if old is None:
+            if spot.wanted: self.wanted.record(spot)
+            self.broadcaster.publish("spot", spot)
+            self.watchlist.check(spot)
+        else:
+            self.broadcaster.publish("spot_update", {"seq": spot.seq, "nspotters": spot.nspotters})
+
+    def _find_seq(self, seq: int):
+        i = self.spot_seq - seq  # seq contiguës : position directe, sinon parcours
+        if 0 <= i < len(self.spots) and self.spots[i].get("seq") == seq:
+            return self.spots[i]
+        return next((s for s in self.spots if s.get("seq") == seq), None)
+
     # ------------- Workers -------------
     def start_workers(self):
-        for target, name in [
-            (self.cluster_worker, "cluster"),
-            (self.rss_worker,     "rss"),
-            (self.persist_worker, "persist")
-        ]:
+        if self.role == "web":
+            workers = [(self.shared_reader_worker, "shared")]
+        else:
+            workers = [
+                (self.cluster_async_worker if self.feeds else self.cluster_worker, "cluster"),
+                (self.rss_worker,     "rss"),
+                (self.persist_worker, "persist")
+            ] + ([(self.history_worker, "history")] if self.history else [])
+            if DXCC_REMOTE_URL:
+                workers.append((self.dxcc_worker, "dxcc"))
+            if self.shared:
+                self.publish_shared()
+                workers.append((self.shared_writer_worker, "shared"))
+        for target, name in workers:
             t = threading.Thread(target=target, daemon=True, name=name)
             t.start()
 
     def persist_worker(self):
+        # Écrit au plus tous les SAVE_INTERVAL s, ou plus tôt après SAVE_EVERY_N spots
         while not self.stop_event.is_set():
+            self.persist_event.wait(SAVE_INTERVAL)
+            self.persist_event.clear()
+            if self.stop_event.is_set(): break
+            if not self.dirty_spots: continue
             try:
                 self.save_spots()
             except Exception as e:
                 logger.debug(f"persist: {e}")
-            if self.stop_event.wait(60): break
+
+    def history_worker(self):
+        while not self.stop_event.is_set():
+            try:
+                self.history.flush(block_first=1.0)
+            except Exception as e:
+                logger.warning(f"[HISTORY] écriture échouée: {e}")
+                self.stop_event.wait(5)
+
+    def shared_writer_worker(self):
+        # Spots / RSS / statut vers SHARED_DB par lots ; statut republié s'il change
+        last_status, last_check = None, 0.0
+        while not self.stop_event.is_set():
+            try:
+                self.shared.flush(block_first=SHARED_POLL)
+                if time.time() - last_check >= SHARED_STATUS_EVERY:
+                    last_check = time.time()
+                    payload = self._status_payload()
+                    if payload != last_status:
+                        self.shared.set("status", payload)
+                        last_status = payload
+                    self.shared.set("metrics", metrics.families(role=self.role))
+            except Exception as e:
+                logger.warning(f"[SHARED] écriture échouée: {e}")
+                self.stop_event.wait(5)
+
+    def shared_reader_worker(self):
+        while not self.stop_event.wait(SHARED_POLL):
+            try:
+                self.sync_shared()
+            except Exception as e:
+                logger.warning(f"[SHARED] relecture échouée: {e}")
+                self.stop_event.wait(5)
 
     def run(self):
         def _sig(sig, frame):
@@ -495,14 +2981,32 @@ class RadioSpotWatcher:
         signal.signal(signal.SIGTERM, _sig)
 
         self.start_workers()
+        if self.role == "ingest":
+            # HTTP servi par les workers ROLE=web (create_app)
+            logger.info(f"Démarrage Radio Spot Watcher {VERSION} : ingestion seule -> {self.shared.path}")
+            try:
+                while not self.stop_event.wait(1): pass
+            finally:
+                self._shutdown()
+            return
         logger.info(f"Démarrage Radio Spot Watcher {VERSION} sur port {HTTP_PORT}")
         try:
+            if HTTP_SERVER == "waitress":
+                try:
+                    from waitress import serve
+                except ImportError:
+                    logger.warning("HTTP_SERVER=waitress mais waitress absent : serveur Flask")
+                else:
+                    logger.info(f"[HTTP] waitress, {HTTP_THREADS} threads (un par client /stream tant qu'il est ouvert)")
+                    serve(self.app, host="0.0.0.0", port=HTTP_PORT, threads=HTTP_THREADS)
+                    return
             self.app.run(host="0.0.0.0", port=HTTP_PORT, debug=False, use_reloader=False)
         finally:
             self._shutdown()
 
     def _shutdown(self):
         self.stop_event.set()
+        self.persist_event.set()
         try:
             if self.cluster_socket:
                 try: self.cluster_socket.shutdown(socket.SHUT_RDWR)
@@ -510,10 +3014,48 @@ class RadioSpotWatcher:
                 try: self.cluster_socket.close()
                 except: pass
         except: pass
-        try: self.save_spots()
-        except: pass
+        if self.role != "web":  # un worker HTTP n'a qu'une copie de la fenêtre
+            try:
+                self._publish_view()  # bloc en cours compris
+                self.save_spots()
+            except: pass
+        if self.journal:
+            self.journal.close()
+        if self.history:
+            try: self.history.flush()
+            except Exception: pass
+        if self.shared:
+            if self.role != "web":
+                try: self.shared.flush()
+                except Exception: pass
+            self.shared.close()
         logger.info("Arrêt OK")
 
+# =========================
+# Entrée WSGI (gunicorn / waitress)
+# =========================
+def create_app(role: Optional[str] = None) -> Flask:
+    """
+    Fabrique d'application pour un serveur WSGI, lancée depuis la racine du
+    dépôt comme l'ingestion (SHARED_DB, dxcc.json, data/... sont relatifs au
+    répertoire courant : pas de --chdir) :
+      ROLE=ingest SHARED_DB=state.db python3 src/webapp.py          # un seul process d'ingestion
+      ROLE=web SHARED_DB=state.db gunicorn -w 4 -k gthread --threads 32 -b 0.0.0.0:8000 \
+          --pythonpath src 'webapp:create_app()'
+      ROLE=web SHARED_DB=state.db PYTHONPATH=src waitress-serve --port=8000 --threads=32 \
+          --call webapp:create_app
+    Chaque client /stream (un par onglet) occupe un thread tant qu'il est
+    connecté : prévoir --threads (gunicorn, par worker ; waitress ;
+    HTTP_THREADS pour python3 src/webapp.py) au-dessus du nombre d'onglets
+    attendus, sinon les requêtes ordinaires attendent un thread libre.
+    ROLE=all (défaut) démarre aussi l'ingestion : un seul worker (-w 1).
+    Pas de --preload : les threads sont démarrés ici, dans chaque worker.
+    """
+    watcher = RadioSpotWatcher(role or ROLE)
+    watcher.start_workers()
+    atexit.register(watcher._shutdown)
+    return watcher.app
+
 # =========================
 # UI (thème clair + palettes)
 # =========================
@@ -560,6 +3102,7 @@ tr:hover td{background:var(--table-row-hover)}
 tr:nth-child(even) td{background:#fff}
 tr.watchhit{background:var(--watch-bg)!important;color:#fff}
 tr.watchhit .call-link{color:inherit!important;text-decoration:underline;font-weight:700}
+.watch-alert{font-size:0.85rem;padding:0.2rem 0.4rem;margin-bottom:0.25rem;border-left:3px solid var(--watch-bg)}
 .call-link{color:var(--accent);text-decoration:none;font-weight:600}
 .call-link:hover{text-decoration:underline}
 .watchlist-input{display:flex;gap:0.5rem;margin-bottom:0.75rem}
@@ -765,7 +3308,7 @@ const PALETTES = {
 
 document.addEventListener('DOMContentLoaded', () => {
   initMap(); initFilters(); loadWatchlist(); initPalette(); initClocks();
-  updateData(); setInterval(updateData, 5000);
+  fetchSide(); startStream(); setInterval(fetchSide, 60000);
   document.getElementById('watchlist-input').addEventListener('keypress', e => { if (e.key === 'Enter') addToWatchlist(); });
 });
 
@@ -773,7 +3316,7 @@ function initPalette(){
   const sel = document.getElementById('palette-choice');
   const saved = localStorage.getItem('uiPalette') || 'default';
   sel.value = saved; applyPalette(saved);
-  sel.addEventListener('change', () => { localStorage.setItem('uiPalette', sel.value); applyPalette(sel.value); updateData(); });
+  sel.addEventListener('change', () => { localStorage.setItem('uiPalette', sel.value); applyPalette(sel.value); renderSpots(); });
 }
 function applyPalette(name){
   const p = PALETTES[name] || PALETTES['default'];
@@ -811,48 +3354,123 @@ function initFilters(){
   ML.forEach(m=>{const o=document.createElement('option');o.value=m;o.textContent=m;mSel.appendChild(o);});
   bSel.value = localStorage.getItem('filterBand') || 'All';
   mSel.value = localStorage.getItem('filterMode') || 'All';
-  bSel.addEventListener('change', ()=>{localStorage.setItem('filterBand', bSel.value); updateData();});
-  mSel.addEventListener('change', ()=>{localStorage.setItem('filterMode', mSel.value); updateData();});
+  bSel.addEventListener('change', ()=>{localStorage.setItem('filterBand', bSel.value); renderSpots();});
+  mSel.addEventListener('change', ()=>{localStorage.setItem('filterMode', mSel.value); renderSpots();});
 }
 
-function updateData(){
-  fetch('/status.json').then(r=>r.json()).then(d=>{
-    const ind = document.querySelector('.status-indicator');
-    const st  = document.getElementById('cluster-status');
-    const dx  = document.getElementById('dxcc-update');
-    ind.className = 'status-indicator ' + (d.cluster_connected ? 'connected' : '');
-    st.textContent = `Cluster: ${d.cluster_host}`;
-    dx.textContent = `DXCC: ${d.dxcc_update || '—'}`;
-  }).catch(()=>{});
+let ALL_SPOTS = [];
+let LAST_SEQ = null;
+let pollTimer = null;
+let ALERT_SEQS = new Set();  // seq des spots signalés par les événements « alert » (ordre d'arrivée, borné)
+let spotStream = null;
 
+function updateData(){
+  fetchStatus(); pollSpots(); fetchSide();
+}
+function applyStatus(d){
+  const ind = document.querySelector('.status-indicator');
+  const st  = document.getElementById('cluster-status');
+  const dx  = document.getElementById('dxcc-update');
+  ind.className = 'status-indicator ' + (d.cluster_connected ? 'connected' : '');
+  st.textContent = `Cluster: ${d.cluster_host}`;
+  dx.textContent = `DXCC: ${d.dxcc_update || '—'}`;
+}
+function fetchStatus(){
+  fetch('/status.json').then(r=>r.json()).then(applyStatus).catch(()=>{});
+}
+function fetchSpots(){
+  // liste complète fusionnée : les spots reçus par SSE pendant la requête (seq > d.seq,
+  // publiés avant la vue servie par /spots.json) restent en tête
   fetch('/spots.json').then(r=>r.json()).then(d=>{
-    const all = d.spots || [];
-    const bf = localStorage.getItem('filterBand') || 'All';
-    const mf = localStorage.getItem('filterMode') || 'All';
-    const filtered = all.filter(s=>{
-      const bOK = (bf==='All') || (s.band===bf);
-      const mOK = (mf==='All') || (s.mode===mf);
-      return bOK && mOK;
-    });
-    updateSpotsTable(filtered);
-    updateMapMarkers(filtered.slice(0, {{ max_map_spots }} ));
-    updateCharts(filtered);
+    const fresh = ALL_SPOTS.filter(s=>(s.seq||0) > d.seq);
+    ALL_SPOTS = fresh.concat(d.spots || []).slice(0, {{ max_spots }});
+    LAST_SEQ = Math.max(d.seq, ...fresh.map(s=>s.seq));
+    renderSpots();
   }).catch(()=>{});
-
+}
+function pollSpots(){
+  // incrémental : ?since=<seq>, le serveur répond 304 si rien de neuf
+  if (LAST_SEQ === null) { fetchSpots(); return; }
+  fetch('/spots.json?since=' + LAST_SEQ).then(r=>r.json()).then(d=>{
+    if (d.reset) { ALL_SPOTS = d.spots || []; }
+    else {
+      const fresh = (d.spots || []).filter(s=>s.seq > LAST_SEQ);
+      if (!fresh.length) return;
+      ALL_SPOTS = fresh.concat(ALL_SPOTS).slice(0, {{ max_spots }});
+    }
+    LAST_SEQ = d.seq; renderSpots();
+  }).catch(()=>{});
+}
+function fetchSide(){
   fetch('/rss.json').then(r=>r.json()).then(d=>updateRSS(d.entries||[])).catch(()=>{});
   fetch('/wanted.json').then(r=>r.json()).then(d=>updateWanted(d.wanted||[])).catch(()=>{});
 }
+function renderSpots(){
+  const bf = localStorage.getItem('filterBand') || 'All';
+  const mf = localStorage.getItem('filterMode') || 'All';
+  const filtered = ALL_SPOTS.filter(s=>{
+    const bOK = (bf==='All') || (s.band===bf);
+    const mOK = (mf==='All') || (s.mode===mf);
+    return bOK && mOK;
+  });
+  updateSpotsTable(filtered);
+  updateMapMarkers(filtered.slice(0, {{ max_map_spots }} ));
+  updateCharts(filtered);
+}
+
+// Flux SSE : ajout incrémental des nouveaux spots et alertes watchlist (le
+// serveur teste chaque spot contre watchlist.json + les motifs ?watch= de ce
+// navigateur) ; repli sur le polling 5 s. Rappelée quand la watchlist change.
+function startPolling(){
+  if (!pollTimer) pollTimer = setInterval(updateData, 5000);
+}
+function startStream(){
+  if (!window.EventSource){ updateData(); startPolling(); return; }
+  if (spotStream) spotStream.close();
+  const wl = JSON.parse(localStorage.getItem('watchlist') || '[]');
+  const es = spotStream = new EventSource('/stream' + (wl.length ? '?watch=' + encodeURIComponent(wl.join(',')) : ''));
+  let pending = false;
+  const schedule = ()=>{ if (!pending){ pending = true; requestAnimationFrame(()=>{ pending = false; renderSpots(); }); } };
+  es.addEventListener('spot', ev=>{
+    let sp; try { sp = JSON.parse(ev.data); } catch(e){ return; }
+    ALL_SPOTS.unshift(sp); if (sp.seq) LAST_SEQ = sp.seq;
+    if (ALL_SPOTS.length > {{ max_spots }}) ALL_SPOTS.length = {{ max_spots }};
+    schedule();
+  });
+  es.addEventListener('spot_update', ev=>{
+    let u; try { u = JSON.parse(ev.data); } catch(e){ return; }
+    const sp = ALL_SPOTS.find(s=>s.seq===u.seq); if (sp){ sp.nspotters = u.nspotters; schedule(); }
+  });
+  es.addEventListener('status', ev=>{ try { applyStatus(JSON.parse(ev.data)); } catch(e){} });
+  es.addEventListener('alert', ev=>{
+    let a; try { a = JSON.parse(ev.data); } catch(e){ return; }
+    const s = a.spot || {};
+    ALERT_SEQS.add(s.seq);
+    while (ALERT_SEQS.size > {{ max_spots }}) ALERT_SEQS.delete(ALERT_SEQS.values().next().value);
+    const box = document.getElementById('watchlist-messages');
+    const d = document.createElement('div'); d.className = 'watch-alert';
+    d.textContent = `${s.utc||''} ${s.call||''} ${s.freq||''} ${s.mode||''} (${(a.patterns||[]).join(', ')})`;
+    box.prepend(d);
+    while (box.children.length > 5) box.lastChild.remove();
+    schedule();
+  });
+  es.addEventListener('open', ()=>{
+    if (pollTimer){ clearInterval(pollTimer); pollTimer = null; }
+    fetchStatus(); fetchSpots();  // resynchronisation après (re)connexion
+  });
+  es.addEventListener('error', ()=>{ if (es === spotStream && es.readyState === EventSource.CLOSED) startPolling(); });
+}
 
 function updateSpotsTable(spots){
   const tb = document.getElementById('spots-tbody'); tb.innerHTML='';
-  const wl = JSON.parse(localStorage.getItem('watchlist') || '[]');
+  const wl = new Set(JSON.parse(localStorage.getItem('watchlist') || '[]'));
   spots.forEach(s=>{
     const tr = document.createElement('tr');
-    if (wl.includes((s.call||'').toUpperCase())) tr.classList.add('watchhit');
+    if (ALERT_SEQS.has(s.seq) || wl.has((s.call||'').toUpperCase())) tr.classList.add('watchhit');
     tr.innerHTML = `
       <td>${s.utc||''}</td>
       <td>${s.freq||''}</td>
-      <td><a class="call-link" href="https://www.qrz.com/db/${s.call||''}" target="_blank">${s.call||''}</a></td>
+      <td><a class="call-link" href="https://www.qrz.com/db/${s.call||''}" target="_blank">${s.call||''}</a>${(s.nspotters||1)>1 ? ` <small title="spotters">×${s.nspotters}</small>` : ''}${s.wanted ? ` <small title="most wanted #${s.wanted}">★</small>` : ''}</td>
       <td>${s.mode||''}</td>
       <td>${s.band||''}</td>
       <td>${s.dxcc||''}</td>
@@ -885,6 +3503,7 @@ function updateWanted(list){
   const c = document.getElementById('most-wanted'); c.innerHTML='';
   list.forEach(x=>{
     const d = document.createElement('div'); d.className='wanted-item';
+    if(!x.match){ d.style.opacity='0.5'; d.title='absente de la table DXCC (ni nom ni préfixe)'; }
     d.innerHTML = `<span class="flag">${x.flag||''}</span><span>${x.name||''}</span>`;
     c.appendChild(d);
   });
@@ -916,10 +3535,10 @@ function drawBar(id, data, cmap){
 function addToWatchlist(){
   const input=document.getElementById('watchlist-input'); const call=(input.value||'').trim().toUpperCase(); if(!call) return;
   let list=JSON.parse(localStorage.getItem('watchlist')||'[]'); if(list.includes(call)) return;
-  list.push(call); localStorage.setItem('watchlist', JSON.stringify(list)); input.value=''; loadWatchlist();
+  list.push(call); localStorage.setItem('watchlist', JSON.stringify(list)); input.value=''; loadWatchlist(); startStream();
 }
 function removeFromWatchlist(call){
-  let list=JSON.parse(localStorage.getItem('watchlist')||'[]'); list=list.filter(c=>c!==call); localStorage.setItem('watchlist', JSON.stringify(list)); loadWatchlist();
+  let list=JSON.parse(localStorage.getItem('watchlist')||'[]'); list=list.filter(c=>c!==call); localStorage.setItem('watchlist', JSON.stringify(list)); loadWatchlist(); startStream();
 }
 function loadWatchlist(){
   const c=document.getElementById('watchlist-items'); c.innerHTML='';